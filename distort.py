@@ -5,11 +5,17 @@ distort.py - Simple WAV distortion (waveshaper) processor.
 How it works:
 1) Reads a WAV file as float32 in [-1, 1]
 2) Applies pre-gain from --drive_db
-3) Distorts with either tanh or hard clipping
+3) Distorts with tanh, a cheap tanh approximation (tanh_fast), or hard clipping
 4) Blends wet/dry with --mix
 5) Applies output gain from --out_db and clips to [-1, 1]
 6) Writes a WAV with the original sample rate
 
+Steps 2-5 run as a single fused pass when numba is installed, otherwise as
+in-place numpy operations. For tanh_fast, an AVX2 kernel is used instead when
+_distort_avx2.so has been built next to this file:
+  cc -O3 -shared -fPIC -o _distort_avx2.so _distort_avx2.c
+With --device gpu, steps 2-5 run as one CuPy kernel on a CUDA GPU.
+
 Usage:
   python distort.py input.wav output.wav --drive_db 12 --mix 1.0 --out_db -1 --mode tanh
   python distort.py --self_test
@@ -18,6 +24,9 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import ctypes
+import math
+import os
 import sys
 from typing import Tuple
 
@@ -25,6 +34,8 @@ import numpy as np
 
 _HAS_SF = False
 _HAS_SCIPY = False
+_HAS_NUMBA = False
+_HAS_CUPY = False
 
 try:
   import soundfile as sf  # type: ignore
@@ -39,6 +50,49 @@ if not _HAS_SF:
   except Exception:
     wavfile = None  # type: ignore
 
+try:
+  from numba import njit, prange  # type: ignore
+  _HAS_NUMBA = True
+except Exception:
+  njit = prange = None  # type: ignore
+
+try:
+  import cupy as cp  # type: ignore
+  _HAS_CUPY = True
+except Exception:
+  cp = None  # type: ignore
+
+_MODE_IDS = {"tanh": 0, "tanh_fast": 1, "hardclip": 2}
+
+
+def _load_avx2_kernel():
+  """Load the optional AVX2 tanh_fast kernel built from _distort_avx2.c, if usable."""
+  path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_distort_avx2.so")
+  try:
+    lib = ctypes.CDLL(path)
+  except OSError:
+    return None
+  if not lib.distort_avx2_supported():
+    return None
+
+  fn = lib.distort_tanh_avx2
+  fn.argtypes = [
+    ctypes.c_void_p,
+    ctypes.c_void_p,
+    ctypes.c_size_t,
+    ctypes.c_float,
+    ctypes.c_float,
+    ctypes.c_float,
+  ]
+  fn.restype = None
+  return fn
+
+
+_distort_tanh_avx2 = _load_avx2_kernel()
+
+# Frames per block when streaming a file through distort_wav
+STREAM_BLOCKSIZE = 1 << 16
+
 
 def _ensure_audio_backend() -> None:
   if not (_HAS_SF or _HAS_SCIPY):
@@ -47,16 +101,29 @@ def _ensure_audio_backend() -> None:
     )
 
 
+def _clip_unit_inplace(buf: np.ndarray) -> np.ndarray:
+  """Clip float32 audio to [-1, 1] in place with scalar min/max ufuncs."""
+  np.minimum(buf, 1.0, out=buf)
+  np.maximum(buf, -1.0, out=buf)
+  return buf
+
+
 def _to_float32_minus1_to_1(x: np.ndarray) -> np.ndarray:
-  """Convert numpy audio array to float32 in [-1, 1]."""
+  """Convert numpy audio array to float32 in [-1, 1] (no copy if it already is)."""
   x = np.asarray(x)
   if np.issubdtype(x.dtype, np.floating):
-    return np.clip(x.astype(np.float32), -1.0, 1.0)
+    if x.dtype == np.float32 and (x.size == 0 or (x.min() >= -1.0 and x.max() <= 1.0)):
+      return x
+    buf = x.astype(np.float32)
+    return _clip_unit_inplace(buf)
 
   if np.issubdtype(x.dtype, np.integer):
     info = np.iinfo(x.dtype)
-    scale = float(max(abs(info.min), info.max))
-    return np.clip(x.astype(np.float32) / scale, -1.0, 1.0)
+    scale_inv = np.float32(1.0 / max(abs(info.min), info.max))
+    buf = np.empty(x.shape, dtype=np.float32)
+    # Multiply by the reciprocal: int->float convert and scale in one float32 pass
+    np.multiply(x, scale_inv, out=buf, dtype=np.float32, casting="unsafe")
+    return _clip_unit_inplace(buf)
 
   raise TypeError(f"Unsupported audio dtype: {x.dtype}")
 
@@ -67,7 +134,10 @@ def read_wav(path: str) -> Tuple[np.ndarray, int]:
 
   if _HAS_SF:
     data, sr = sf.read(path, dtype="float32", always_2d=False)  # type: ignore
-    return _to_float32_minus1_to_1(data), int(sr)
+    # soundfile already decoded to float32; clip in place rather than copying,
+    # and keep it C-contiguous for the vectorized kernels downstream.
+    data = np.ascontiguousarray(data)
+    return _clip_unit_inplace(data), int(sr)
 
   sr, data = wavfile.read(path)  # type: ignore
   return _to_float32_minus1_to_1(data), int(sr)
@@ -76,7 +146,10 @@ def read_wav(path: str) -> Tuple[np.ndarray, int]:
 def write_wav(path: str, audio: np.ndarray, sr: int) -> None:
   """Write float32 audio in [-1, 1] as WAV."""
   _ensure_audio_backend()
-  audio = np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0)
+  audio = np.asarray(audio, dtype=np.float32)
+  # Only pay for a clipped copy when something is actually out of range
+  if audio.size and (audio.max() > 1.0 or audio.min() < -1.0):
+    audio = _clip_unit_inplace(audio.copy())
 
   if _HAS_SF:
     sf.write(path, audio, sr, subtype="PCM_16")  # type: ignore
@@ -84,40 +157,168 @@ def write_wav(path: str, audio: np.ndarray, sr: int) -> None:
     wavfile.write(path, sr, audio)  # type: ignore
 
 
+if _HAS_NUMBA:
+  @njit(parallel=True, fastmath=True, cache=True)  # type: ignore
+  def _distort_kernel(x, out, pre_gain, mix, out_gain, mode_id):
+    """Fused waveshaper over flat float32 arrays: one read and one write per sample."""
+    for i in prange(x.size):
+      xi = x[i]
+      xg = xi * pre_gain
+      if mode_id == 0:
+        y = math.tanh(xg)
+      elif mode_id == 1:
+        y = xg / math.sqrt(1.0 + xg * xg)
+      else:
+        y = min(max(xg, -1.0), 1.0)
+      o = ((1.0 - mix) * xi + mix * y) * out_gain
+      out[i] = min(max(o, -1.0), 1.0)
+
+
+if _HAS_CUPY:
+  # Whole chain fused into one GPU kernel launch
+  _distort_gpu_kernel = cp.ElementwiseKernel(  # type: ignore
+    "T x, T pg, T mix, T og, int32 mode_id",
+    "T out",
+    """
+    T xg = x * pg;
+    T y;
+    if (mode_id == 0) {
+      y = tanh(xg);
+    } else if (mode_id == 1) {
+      y = xg / sqrt((T)1 + xg * xg);
+    } else {
+      y = xg < (T)-1 ? (T)-1 : (xg > (T)1 ? (T)1 : xg);
+    }
+    T o = (((T)1 - mix) * x + mix * y) * og;
+    out = o < (T)-1 ? (T)-1 : (o > (T)1 ? (T)1 : o);
+    """,
+    "distort_waveshape",
+  )
+
+
+def _distort_audio_gpu(
+  x: np.ndarray, pre_gain: float, mix: float, out_gain: float, mode: str
+) -> np.ndarray:
+  if not _HAS_CUPY:
+    raise RuntimeError("device='gpu' requires CuPy. Install 'cupy' for your CUDA version.")
+
+  x_gpu = cp.asarray(x)  # type: ignore
+  out_gpu = _distort_gpu_kernel(
+    x_gpu,
+    np.float32(pre_gain),
+    np.float32(mix),
+    np.float32(out_gain),
+    np.int32(_MODE_IDS[mode]),
+  )
+  return cp.asnumpy(out_gpu)  # type: ignore
+
+
 def distort_audio(
   x: np.ndarray,
   drive_db: float = 12.0,
   mix: float = 1.0,
   out_db: float = -1.0,
   mode: str = "tanh",
+  device: str = "cpu",
 ) -> np.ndarray:
-  """Apply distortion to mono/stereo float32 audio in [-1, 1]."""
+  """Apply distortion to mono/stereo float32 audio in [-1, 1] on 'cpu' or 'gpu' (CuPy)."""
   x = _to_float32_minus1_to_1(x)
-  mix = float(np.clip(mix, 0.0, 1.0))
+  mix = min(max(float(mix), 0.0), 1.0)
+
+  if mode not in _MODE_IDS:
+    raise ValueError(f"Unsupported mode: {mode}")
+  if device not in ("cpu", "gpu"):
+    raise ValueError(f"Unsupported device: {device}")
 
   pre_gain = 10.0 ** (float(drive_db) / 20.0)
-  xg = x * pre_gain
+  out_gain = 10.0 ** (float(out_db) / 20.0)
+
+  if device == "gpu":
+    return _distort_audio_gpu(x, pre_gain, mix, out_gain, mode)
+
+  if mode == "tanh_fast" and _distort_tanh_avx2 is not None:
+    x = np.ascontiguousarray(x)
+    out = np.empty_like(x)
+    _distort_tanh_avx2(x.ctypes.data, out.ctypes.data, x.size, pre_gain, mix, out_gain)
+    return out
+
+  if _HAS_NUMBA:
+    x = np.ascontiguousarray(x)
+    out = np.empty_like(x)
+    _distort_kernel(x.reshape(-1), out.reshape(-1), pre_gain, mix, out_gain, _MODE_IDS[mode])
+    return out
+
+  # Every stage writes into these preallocated buffers to avoid full-length
+  # temporaries; tmp holds the second operand of tanh_fast and the dry mix.
+  buf = np.empty_like(x)
+  tmp = np.empty_like(x) if mode == "tanh_fast" or mix < 1.0 else None
+  np.multiply(x, pre_gain, out=buf)
 
   if mode == "tanh":
-    y = np.tanh(xg)
-  elif mode == "hardclip":
-    y = np.clip(xg, -1.0, 1.0)
+    np.tanh(buf, out=buf)
+  elif mode == "tanh_fast":
+    # x / sqrt(1 + x^2): close to tanh for waveshaping, much cheaper than libm tanh
+    np.multiply(buf, buf, out=tmp)
+    tmp += 1.0
+    np.sqrt(tmp, out=tmp)
+    buf /= tmp
   else:
-    raise ValueError(f"Unsupported mode: {mode}")
+    _clip_unit_inplace(buf)
+
+  # out = ((1 - mix) * x + mix * y) * out_gain, with the gain folded into both terms
+  buf *= mix * out_gain
+  if mix < 1.0:
+    np.multiply(x, (1.0 - mix) * out_gain, out=tmp)
+    buf += tmp
+  _clip_unit_inplace(buf)
+  return buf
+
+
+def distort_wav(
+  in_path: str,
+  out_path: str,
+  blocksize: int = STREAM_BLOCKSIZE,
+  **params,
+) -> Tuple[int, int]:
+  """Distort a WAV file -> (frames_written, sample_rate).
+
+  With soundfile the file is streamed block by block, so memory use is bounded
+  by blocksize rather than file length. The scipy backend loads the whole file.
+  """
+  _ensure_audio_backend()
 
-  out = (1.0 - mix) * x + mix * y
-  out_gain = 10.0 ** (float(out_db) / 20.0)
-  out = out * out_gain
-  out = np.clip(out, -1.0, 1.0).astype(np.float32)
-  return out
+  if not _HAS_SF:
+    x, sr = read_wav(in_path)
+    y = distort_audio(x, **params)
+    write_wav(out_path, y, sr)
+    return len(y), sr
+
+  info = sf.info(in_path)  # type: ignore
+  frames = 0
+  with sf.SoundFile(  # type: ignore
+    out_path,
+    mode="w",
+    samplerate=info.samplerate,
+    channels=info.channels,
+    subtype="PCM_16",
+  ) as f:
+    for block in sf.blocks(in_path, blocksize=blocksize, dtype="float32", always_2d=False):  # type: ignore
+      f.write(distort_audio(block, **params))
+      frames += len(block)
+  return frames, int(info.samplerate)
 
 
 def self_test() -> None:
   """Minimal runtime check for processor behavior."""
   sr = 48_000
   duration_s = 1.0
-  t = np.arange(int(sr * duration_s), dtype=np.float32) / sr
-  sine = 0.25 * np.sin(2.0 * np.pi * 440.0 * t).astype(np.float32)
+  n = int(sr * duration_s)
+  omega = np.float32(2.0 * np.pi * 440.0 / sr)
+  # Stay in float32 throughout so np.sin never upcasts to float64
+  sine = np.arange(n, dtype=np.float32)
+  sine *= omega
+  np.sin(sine, out=sine)
+  sine *= np.float32(0.25)
 
   out = distort_audio(
     sine,
@@ -131,6 +332,11 @@ def self_test() -> None:
   assert np.min(out) >= -1.0 - 1e-6
   assert not np.allclose(out, sine), "Output should differ from input for drive_db > 0"
 
+  out_fast = distort_audio(sine, drive_db=12.0, mix=1.0, out_db=-1.0, mode="tanh_fast")
+  assert out_fast.shape == sine.shape
+  assert np.max(np.abs(out_fast)) <= 1.0 + 1e-6
+  assert np.max(np.abs(out_fast - out)) < 0.15, "tanh_fast should track tanh closely"
+
   stereo = np.stack([sine, sine], axis=1)
   out_st = distort_audio(stereo, drive_db=12.0, mix=0.7, out_db=-1.0, mode="hardclip")
   assert out_st.shape == stereo.shape
@@ -149,10 +355,16 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
   parser.add_argument("--out_db", type=float, default=-1.0, help="Output gain in dB (default: -1)")
   parser.add_argument(
     "--mode",
-    choices=("tanh", "hardclip"),
+    choices=tuple(_MODE_IDS),
     default="tanh",
     help="Distortion mode (default: tanh)",
   )
+  parser.add_argument(
+    "--device",
+    choices=("cpu", "gpu"),
+    default="cpu",
+    help="Process on CPU or on a CUDA GPU via CuPy (default: cpu)",
+  )
   parser.add_argument(
     "--self_test",
     action="store_true",
@@ -172,16 +384,16 @@ def main(argv: list[str] | None = None) -> int:
     print("Error: input and output are required unless --self_test is used.", file=sys.stderr)
     return 2
 
-  x, sr = read_wav(args.input)
-  y = distort_audio(
-    x,
+  frames, sr = distort_wav(
+    args.input,
+    args.output,
     drive_db=args.drive_db,
     mix=args.mix,
     out_db=args.out_db,
     mode=args.mode,
+    device=args.device,
   )
-  write_wav(args.output, y, sr)
-  print(f"Wrote: {args.output} (sr={sr}, shape={y.shape}, mode={args.mode})")
+  print(f"Wrote: {args.output} (sr={sr}, frames={frames}, mode={args.mode})")
   return 0
 
 
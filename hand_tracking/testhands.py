@@ -1,6 +1,10 @@
 # test_hands_finger_labels.py
+import argparse
+import threading
+
 import cv2
 import mediapipe as mp
+import numpy as np
 
 # ---------------- CONFIG ----------------
 # Left hand style
@@ -19,85 +23,239 @@ CONNECTION_THICKNESS = 3
 CONNECTION_RADIUS = 2
 TEXT_SCALE = 1
 TEXT_THICKNESS = 2
+
+# Frames wider than this are downscaled before hand detection. The landmark
+# model's input is ~256 px, so accuracy is about the same at a fraction of the
+# cost; landmarks are normalized, so drawing at full resolution is unchanged.
+INFERENCE_WIDTH = 640
+
+# Mean absolute grayscale change (0-255) since the last detection below which
+# the frame counts as still and the previous hand results are reused
+MOTION_THRESHOLD = 2.0
 # ----------------------------------------
 
+parser = argparse.ArgumentParser(description="Real-time hand tracking with finger gestures")
+parser.add_argument(
+    "--model-complexity", type=int, choices=(0, 1), default=0,
+    help="Hand landmark model: 0 = lite (about 2x faster), 1 = full (default: 0)"
+)
+parser.add_argument(
+    "--min-detection-confidence", type=float, default=0.5,
+    help="Minimum palm detection confidence (default: 0.5)"
+)
+parser.add_argument(
+    "--min-tracking-confidence", type=float, default=0.3,
+    help="Minimum tracking confidence before palm detection re-runs (default: 0.3)"
+)
+args = parser.parse_args()
+
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
-cap = cv2.VideoCapture(0)
+# Drawing styles per hand, built once: (landmark spec, connection spec, text color)
+_SPECS = {
+    'Left': (
+        mp_drawing.DrawingSpec(
+            color=LEFT_LANDMARK_COLOR, thickness=LANDMARK_THICKNESS, circle_radius=LANDMARK_RADIUS
+        ),
+        mp_drawing.DrawingSpec(
+            color=LEFT_CONNECTION_COLOR, thickness=CONNECTION_THICKNESS, circle_radius=CONNECTION_RADIUS
+        ),
+        LEFT_TEXT_COLOR,
+    ),
+    'Right': (
+        mp_drawing.DrawingSpec(
+            color=RIGHT_LANDMARK_COLOR, thickness=LANDMARK_THICKNESS, circle_radius=LANDMARK_RADIUS
+        ),
+        mp_drawing.DrawingSpec(
+            color=RIGHT_CONNECTION_COLOR, thickness=CONNECTION_THICKNESS, circle_radius=CONNECTION_RADIUS
+        ),
+        RIGHT_TEXT_COLOR,
+    ),
+}
+
+# Action label by number of fingers up
+ACTION_LABELS = ("Fist", "One Finger", "Two Fingers", "Three Fingers", "Four Fingers", "Open Hand")
+
+# Landmark indices: fingertips of index..pinky and the PIP joint below each
+FINGER_TIP_IDS = np.array([8, 12, 16, 20])
+FINGER_PIP_IDS = np.array([6, 10, 14, 18])
+THUMB_TIP_ID = 4
+THUMB_IP_ID = 3
+
+
+def make_text_sprite(text, color, pad=2):
+    """
+    Render text once into a small image. Returns (sprite, mask, origin), where
+    origin is the text baseline's position inside the sprite.
+    """
+    (text_w, text_h), baseline = cv2.getTextSize(
+        text, cv2.FONT_HERSHEY_SIMPLEX, TEXT_SCALE, TEXT_THICKNESS
+    )
+    sprite = np.zeros((text_h + baseline + 2 * pad, text_w + 2 * pad, 3), dtype=np.uint8)
+    origin = (pad, pad + text_h)
+    cv2.putText(sprite, text, origin, cv2.FONT_HERSHEY_SIMPLEX, TEXT_SCALE, color, TEXT_THICKNESS, cv2.LINE_AA)
+    return sprite, sprite.any(axis=2, keepdims=True), origin
+
+
+def draw_sprite(frame, sprite_entry, x, y):
+    """Copy a pre-rendered text sprite onto frame with its baseline at (x, y), clipped to the frame"""
+    sprite, mask, (origin_x, origin_y) = sprite_entry
+    top, left = y - origin_y, x - origin_x
+    y0, x0 = max(top, 0), max(left, 0)
+    y1 = min(top + sprite.shape[0], frame.shape[0])
+    x1 = min(left + sprite.shape[1], frame.shape[1])
+    if y0 >= y1 or x0 >= x1:
+        return
+    src = np.s_[y0 - top:y1 - top, x0 - left:x1 - left]
+    np.copyto(frame[y0:y1, x0:x1], sprite[src], where=mask[src])
+
+
+# Hand and gesture labels are fixed strings, so rasterize them once per hand color
+_LABEL_SPRITES = {
+    hand: {
+        text: make_text_sprite(text, text_color)
+        for text in (f"{hand} Hand",) + ACTION_LABELS
+    }
+    for hand, (_, _, text_color) in _SPECS.items()
+}
+
+
+class FrameGrabber(threading.Thread):
+    """
+    Reads the camera on a background thread so capture overlaps inference.
+    Only the newest frame is kept; read() never returns the same frame twice.
+    """
+
+    def __init__(self, capture):
+        super().__init__(daemon=True)
+        self.capture = capture
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._ret, self._frame = False, None
+        self._seq = self._read_seq = 0
+        self._error = None
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                ret, frame = self.capture.read()
+                if not ret:
+                    break
+                with self._cond:
+                    self._ret, self._frame = ret, frame
+                    self._seq += 1
+                    self._cond.notify()
+        except Exception as exc:
+            self._error = exc  # Re-raised by read() on the main thread
+        finally:
+            # Always publish a final failed read, so read() cannot wait forever
+            # after the camera fails or capture.read() raises
+            with self._cond:
+                self._ret, self._frame = False, None
+                self._seq += 1
+                self._cond.notify()
+
+    def read(self):
+        """Wait for a frame newer than the last one returned; returns (ret, frame)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != self._read_seq)
+            self._read_seq = self._seq
+            if self._error is not None:
+                raise self._error
+            return self._ret, self._frame
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
 
 # Helper function to count extended fingers
 def count_fingers(hand_landmarks, handedness_label):
     """
     Returns number of fingers up (0-5)
-    Uses tip landmarks and compares to PIP/MCP for each finger.
+    Uses tip landmarks and compares to PIP for each finger.
     Thumb uses x-axis instead of y-axis
     """
-    tips_ids = [4, 8, 12, 16, 20]  # thumb, index, middle, ring, pinky
-    fingers = []
+    # One pass over the landmarks, then vector compares
+    pts = np.array([(p.x, p.y) for p in hand_landmarks.landmark], dtype=np.float32)
 
-    # Thumb
-    if handedness_label == 'Right':
-        if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-    else:  # Left hand
-        if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
+    # Thumb points left for a right hand, right for a left hand
+    sign = -1 if handedness_label == 'Right' else 1
+    thumb_up = sign * (pts[THUMB_TIP_ID, 0] - pts[THUMB_IP_ID, 0]) > 0
 
-    # Other fingers (index to pinky)
-    for tip_id in tips_ids[1:]:
-        if hand_landmarks.landmark[tip_id].y < hand_landmarks.landmark[tip_id - 2].y:
-            fingers.append(1)
-        else:
-            fingers.append(0)
+    # Other fingers (index to pinky): tip above PIP joint
+    return int(thumb_up) + int((pts[FINGER_TIP_IDS, 1] < pts[FINGER_PIP_IDS, 1]).sum())
 
-    return sum(fingers)
 
+cap = cv2.VideoCapture(0)
+
+# Fail up front rather than inside the frame loop
+if not cap.isOpened():
+    print("Can't open camera. Exiting.")
+    raise SystemExit(1)
+
+grabber = FrameGrabber(cap)
+grabber.start()
 
 with mp_hands.Hands(
     static_image_mode=False,
     max_num_hands=2,
-    model_complexity=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
+    model_complexity=args.model_complexity,
+    min_detection_confidence=args.min_detection_confidence,
+    min_tracking_confidence=args.min_tracking_confidence
 ) as hands:
+    # Per-frame buffers, reused so flip/resize/convert don't allocate every frame
+    flipped = small = rgb = gray = ref_gray = diff = None
+    # Results of the last detection and the grayscale frame it ran on
+    last_results = None
+
     while True:
-        ret, frame = cap.read()
+        ret, frame = grabber.read()
         if not ret:
             print("Can't read camera. Exiting.")
             break
 
-        frame = cv2.flip(frame, 1)  # mirror view
+        if flipped is None or flipped.shape != frame.shape:
+            frame_h, frame_w = frame.shape[:2]
+            scale = min(1.0, INFERENCE_WIDTH / frame_w)
+            infer_size = (round(frame_w * scale), round(frame_h * scale))  # (width, height)
+            flipped = np.empty_like(frame)
+            small = np.empty((infer_size[1], infer_size[0], 3), dtype=np.uint8) if scale < 1.0 else None
+            rgb = np.empty((infer_size[1], infer_size[0], 3), dtype=np.uint8)
+            gray = np.empty((infer_size[1], infer_size[0]), dtype=np.uint8)
+            ref_gray = np.empty_like(gray)
+            diff = np.empty_like(gray)
+            last_results = None
+
+        frame = cv2.flip(frame, 1, dst=flipped)  # mirror view
         h, w, _ = frame.shape
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if small is not None:
+            cv2.resize(frame, infer_size, dst=small, interpolation=cv2.INTER_AREA)
+        infer_frame = small if small is not None else frame
+
+        # Skip detection while nothing has moved since it last ran
+        cv2.cvtColor(infer_frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        if last_results is not None and cv2.absdiff(gray, ref_gray, dst=diff).mean() < MOTION_THRESHOLD:
+            results = last_results
+        else:
+            cv2.cvtColor(infer_frame, cv2.COLOR_BGR2RGB, dst=rgb)
+
+            # Read-only input lets MediaPipe skip copying the image
+            rgb.flags.writeable = False
+            results = hands.process(rgb)
+            rgb.flags.writeable = True
 
-        results = hands.process(rgb)
+            last_results = results
+            gray, ref_gray = ref_gray, gray
 
         if results.multi_hand_landmarks and results.multi_handedness:
             for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
                 label = handedness.classification[0].label  # 'Left' or 'Right'
 
                 # Choose colors depending on hand
-                if label == 'Left':
-                    landmark_style = mp_drawing.DrawingSpec(
-                        color=LEFT_LANDMARK_COLOR, thickness=LANDMARK_THICKNESS, circle_radius=LANDMARK_RADIUS
-                    )
-                    connection_style = mp_drawing.DrawingSpec(
-                        color=LEFT_CONNECTION_COLOR, thickness=CONNECTION_THICKNESS, circle_radius=CONNECTION_RADIUS
-                    )
-                    text_color = LEFT_TEXT_COLOR
-                else:  # Right
-                    landmark_style = mp_drawing.DrawingSpec(
-                        color=RIGHT_LANDMARK_COLOR, thickness=LANDMARK_THICKNESS, circle_radius=LANDMARK_RADIUS
-                    )
-                    connection_style = mp_drawing.DrawingSpec(
-                        color=RIGHT_CONNECTION_COLOR, thickness=CONNECTION_THICKNESS, circle_radius=CONNECTION_RADIUS
-                    )
-                    text_color = RIGHT_TEXT_COLOR
+                landmark_style, connection_style, _ = _SPECS[label]
+                sprites = _LABEL_SPRITES[label]
 
                 # Draw landmarks
                 mp_drawing.draw_landmarks(
@@ -117,32 +275,18 @@ with mp_hands.Hands(
                 fingers_up = count_fingers(hand_landmarks, label)
 
                 # Map number of fingers to action label
-                if fingers_up == 0:
-                    action_label = "Fist"
-                elif fingers_up == 1:
-                    action_label = "One Finger"
-                elif fingers_up == 2:
-                    action_label = "Two Fingers"
-                elif fingers_up == 3:
-                    action_label = "Three Fingers"
-                elif fingers_up == 4:
-                    action_label = "Four Fingers"
-                elif fingers_up == 5:
-                    action_label = "Open Hand"
-                else:
-                    action_label = f"{fingers_up} Fingers"
+                action_label = ACTION_LABELS[fingers_up]
 
                 # Draw hand label
-                cv2.putText(frame, f"{label} Hand", (x, y),
-                            cv2.FONT_HERSHEY_SIMPLEX, TEXT_SCALE, text_color, TEXT_THICKNESS, cv2.LINE_AA)
+                draw_sprite(frame, sprites[f"{label} Hand"], x, y)
 
                 # Draw action label (gesture)
-                cv2.putText(frame, f"{action_label}", (x, y - 25),
-                            cv2.FONT_HERSHEY_SIMPLEX, TEXT_SCALE, text_color, TEXT_THICKNESS, cv2.LINE_AA)
+                draw_sprite(frame, sprites[action_label], x, y - 25)
 
         cv2.imshow('MediaPipe Hands (Finger Gestures)', frame)
-        if cv2.waitKey(5) & 0xFF == 27:  # ESC to exit
+        if cv2.waitKey(1) & 0xFF == 27:  # ESC to exit (1 ms poll, so work sets the frame rate)
             break
 
+grabber.stop()
 cap.release()
 cv2.destroyAllWindows()
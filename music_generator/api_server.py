@@ -3,10 +3,13 @@ Flask API for Song Generation
 Provides HTTP endpoint for generating music from conversation context
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+import importlib.util
 import os
+import sys
 import json
+import threading
 from pathlib import Path
 from generate_music import ElevenLabsMusicGenerator
 import logging
@@ -14,6 +17,11 @@ import logging
 app = Flask(__name__)
 CORS(app)  # Enable CORS for requests from Node.js server
 
+# Generated songs are never rewritten, so clients may cache them
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 3600
+# Let a fronting nginx/Apache serve file bodies (X-Sendfile) when enabled
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +30,19 @@ logger = logging.getLogger(__name__)
 OUTPUT_DIR = Path(__file__).parent.parent / 'mixer' / 'audio_files'
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Shared generator so its HTTP client (and pooled connections) outlive a request
+_generator = None
+_generator_lock = threading.Lock()
+
+def get_generator():
+    """Return the shared ElevenLabsMusicGenerator, creating it on first use"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = ElevenLabsMusicGenerator()
+    return _generator
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -43,7 +64,8 @@ def generate_song():
     """
     try:
         data = request.json
-        logger.info(f"Received generation request: {json.dumps(data, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received generation request: {json.dumps(data)}")
         
         # Validate required fields
         required_fields = ['lyrics', 'genre', 'mood', 'tempo']
@@ -67,11 +89,12 @@ def generate_song():
         output_path = OUTPUT_DIR / filename
         
         logger.info(f"Generating song to: {output_path}")
-        logger.info(f"Lyrics: {lyrics}")
-        logger.info(f"Genre: {genre} | Mood: {mood} | Tempo: {tempo}")
+        logger.info(
+            f"Lyrics: {len(lyrics)} chars | Genre: {genre} | Mood: {mood} | "
+            f"Tempo: {tempo} | Length: {length_ms} ms"
+        )
         
-        # Initialize generator
-        generator = ElevenLabsMusicGenerator()
+        generator = get_generator()
         
         # Use a cappella genre for vocals-only
         actual_genre = 'a cappella'
@@ -119,19 +142,51 @@ def download_song(filename):
         if not file_path.exists():
             return jsonify({'error': 'File not found'}), 404
         
-        return send_file(
-            file_path,
+        # conditional=True answers Range (206) and If-None-Match (304) requests
+        return send_from_directory(
+            OUTPUT_DIR,
+            filename,
             mimetype='audio/mpeg',
             as_attachment=True,
-            download_name=filename
+            download_name=filename,
+            conditional=True,
+            etag=True,
+            last_modified=file_path.stat().st_mtime
         )
     except Exception as e:
         logger.error(f"Error downloading file: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def run_production_server(port):
+    """
+    Replace this process with gunicorn so concurrent /generate calls don't serialize.
+    
+    Equivalent to: gunicorn -k gevent -w 4 --timeout 120 api_server:app
+    gunicorn loads the app by import string in each worker, after gevent has
+    monkey-patched, so Flask, requests and ssl are imported already patched.
+    Raises ImportError when gunicorn or gevent is missing.
+    """
+    for module in ('gunicorn', 'gevent'):
+        if importlib.util.find_spec(module) is None:
+            raise ImportError(f"{module} is not installed")
+    
+    os.execv(sys.executable, [
+        sys.executable, '-m', 'gunicorn',
+        '--worker-class', 'gevent',
+        '--workers', os.environ.get('WEB_CONCURRENCY', '4'),
+        '--timeout', '120',
+        '--bind', f'0.0.0.0:{port}',
+        '--chdir', str(Path(__file__).parent),
+        'api_server:app',
+    ])
+
 if __name__ == '__main__':
     # Run on port 5000 by default
     port = int(os.environ.get('PORT', 5000))
     logger.info(f"Starting music generator API on port {port}")
     logger.info(f"Output directory: {OUTPUT_DIR}")
-    app.run(host='0.0.0.0', port=port, debug=True)
+    try:
+        run_production_server(port)
+    except ImportError:
+        logger.warning("gunicorn/gevent not installed, falling back to the Flask development server")
+        app.run(host='0.0.0.0', port=port, debug=True)
@@ -3,7 +3,9 @@
 Generate actual singing/music from lyrics using Eleven Labs Music API
 """
 
+import itertools
 import os
+import time
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
@@ -11,6 +13,27 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Buffer size for writing streamed audio chunks to disk (1 MiB)
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Retry policy for transient Music API failures
+COMPOSE_RETRIES = 3
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_BACKOFF_S = 10
+
+# Production details appended to the prompt for known genres (keys are lowercase)
+GENRE_DETAILS = {
+    "pop": "with catchy melodies, modern production, and clear vocals",
+    "rock": "with electric guitars, driving drums, and powerful vocals",
+    "jazz": "with smooth instrumentation, improvisation, and soulful vocals",
+    "country": "with acoustic guitar, storytelling vocals, and warm harmonies",
+    "electronic": "with synth layers, electronic beats, and processed vocals",
+    "rap": "with hip-hop beats, rhythmic flow, and strong bass",
+    "r&b": "with smooth grooves, emotional vocals, and rich harmonies",
+    "folk": "with acoustic instruments, natural vocals, and simple arrangements",
+    "classical": "with orchestral elements and operatic or refined vocals",
+}
+
 
 class ElevenLabsMusicGenerator:
     """Generate real singing and music using Eleven Labs Music API"""
@@ -24,6 +47,7 @@ class ElevenLabsMusicGenerator:
                      will look for ELEVEN_LABS_API_KEY environment variable
         """
         try:
+            import httpx
             from elevenlabs.client import ElevenLabs
             self.ElevenLabs = ElevenLabs
         except ImportError:
@@ -38,7 +62,34 @@ class ElevenLabsMusicGenerator:
                 "ELEVEN_LABS_API_KEY environment variable"
             )
         
-        self.client = self.ElevenLabs(api_key=self.api_key)
+        # One pooled keep-alive HTTP client for every call (and retry) this
+        # generator makes; the transport retries failed connection attempts.
+        self.http_client = httpx.Client(
+            transport=httpx.HTTPTransport(retries=3),
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+        self.client = self.ElevenLabs(api_key=self.api_key, httpx_client=self.http_client)
+    
+    def _compose(self, **kwargs):
+        """
+        Call client.music.compose, retrying transient API errors (429/5xx)
+        with exponential backoff. Returns an iterator over audio chunks.
+        """
+        for attempt in range(COMPOSE_RETRIES + 1):
+            try:
+                # The stream may be lazy, so pull the first chunk to surface errors here
+                track = iter(self.client.music.compose(**kwargs))
+                first = next(track, b"")
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status not in RETRY_STATUS_CODES or attempt == COMPOSE_RETRIES:
+                    raise
+                delay = min(2 ** attempt, MAX_BACKOFF_S)
+                print(f"⚠️  API returned {status}, retrying in {delay}s...")
+                time.sleep(delay)
+                continue
+            return itertools.chain((first,), track)
     
     def generate_music_from_lyrics(
         self,
@@ -85,12 +136,12 @@ class ElevenLabsMusicGenerator:
                 print("✓ Composition plan created")
                 
                 # Generate music from plan
-                track = self.client.music.compose(
+                track = self._compose(
                     composition_plan=composition_plan,
                 )
             else:
                 # Direct generation from prompt
-                track = self.client.music.compose(
+                track = self._compose(
                     prompt=prompt,
                     music_length_ms=music_length_ms,
                 )
@@ -100,11 +151,7 @@ class ElevenLabsMusicGenerator:
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
             print("💾 Saving track...")
-            total_bytes = 0
-            with open(output_path, "wb") as f:
-                for chunk in track:
-                    f.write(chunk)
-                    total_bytes += len(chunk)
+            total_bytes = self._save_track(track, output_path)
             
             print(f"✓ Music generated successfully: {output_path}")
             print(f"✓ File size: {total_bytes / 1024:.2f} KB")
@@ -123,51 +170,40 @@ class ElevenLabsMusicGenerator:
                         print(f"⚠️  Original prompt had issues. Suggestion: {suggestion}")
                         print("Retrying with suggested prompt...")
                         
-                        track = self.client.music.compose(
+                        track = self._compose(
                             prompt=suggestion,
                             music_length_ms=music_length_ms,
                         )
                         
                         output_path = Path(output_path)
-                        with open(output_path, "wb") as f:
-                            for chunk in track:
-                                f.write(chunk)
+                        self._save_track(track, output_path)
                         
                         print(f"✓ Music generated with adjusted prompt: {output_path}")
                         return str(output_path)
             
             raise Exception(f"Failed to generate music: {error_msg}")
     
+    def _save_track(self, track, output_path: Path) -> int:
+        """Write streamed audio chunks to disk and return the number of bytes written"""
+        total_bytes = 0
+        with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            write = f.write
+            for chunk in track:
+                write(chunk)
+                total_bytes += len(chunk)
+        return total_bytes
+    
     def _build_prompt(self, lyrics: str, genre: str, tempo: str, mood: str) -> str:
         """Build a music generation prompt from lyrics and parameters"""
-        
-        # Format lyrics for the prompt
-        lyrics_formatted = lyrics.strip()
-        
-        # Build detailed prompt
-        prompt_parts = [
-            f"Create a {mood} {genre} song with {tempo} tempo.",
-            f"The song should have vocals singing the following lyrics:",
-            f'"{lyrics_formatted}"',
-        ]
+        prompt = (
+            f"Create a {mood} {genre} song with {tempo} tempo. "
+            f"The song should have vocals singing the following lyrics: "
+            f'"{lyrics.strip()}"'
+        )
         
         # Add genre-specific details
-        genre_details = {
-            "pop": "with catchy melodies, modern production, and clear vocals",
-            "rock": "with electric guitars, driving drums, and powerful vocals",
-            "jazz": "with smooth instrumentation, improvisation, and soulful vocals",
-            "country": "with acoustic guitar, storytelling vocals, and warm harmonies",
-            "electronic": "with synth layers, electronic beats, and processed vocals",
-            "rap": "with hip-hop beats, rhythmic flow, and strong bass",
-            "r&b": "with smooth grooves, emotional vocals, and rich harmonies",
-            "folk": "with acoustic instruments, natural vocals, and simple arrangements",
-            "classical": "with orchestral elements and operatic or refined vocals",
-        }
-        
-        if genre.lower() in genre_details:
-            prompt_parts.append(genre_details[genre.lower()])
-        
-        return " ".join(prompt_parts)
+        detail = GENRE_DETAILS.get(genre.lower())
+        return f"{prompt} {detail}" if detail else prompt
     
     def generate_from_file(
         self,
@@ -3,27 +3,180 @@
 Generate singing voice from lyrics using Eleven Labs API
 """
 
+import functools
+import hashlib
+import json
+import mmap
 import os
-import requests
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Chunk size for streaming generated audio to disk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Root of the on-disk caches: generated audio (tts/), the voice catalog
+# (voices/) and interactive_singing's lyrics completions (llm/)
+CACHE_DIR = Path(os.getenv("LISTENHACKS_CACHE", "~/.cache/listenhacks")).expanduser()
+
+# How long a cached generated MP3 is reused for identical requests (7 days)
+TTS_CACHE_TTL_SEC = 86400 * 7
+
+
+# Longest text a single text-to-speech request accepts; checked locally to
+# fail fast instead of after a round-trip
+MAX_TTS_CHARS = 5000
+
+# Lyrics files above this size are read through mmap
+MMAP_THRESHOLD = 1 << 20
+
+# io_uring write path for MP3 output on Linux (needs `pip install liburing`);
+# set LISTENHACKS_URING=0 to use plain buffered writes
+USE_URING = sys.platform == "linux" and os.getenv("LISTENHACKS_URING", "1") == "1"
+URING_CHUNK_SIZE = 1 << 20
+# Writes submitted per io_uring_submit call (also the ring depth)
+URING_BATCH = 8
+
+# Sentence / line boundaries where lyrics can be split without breaking a phrase
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?\n])\s+")
+
+
+def _split_lyrics(lyrics: str, chunks: int) -> list:
+    """
+    Split lyrics on sentence/line boundaries into at most `chunks` contiguous
+    parts of roughly equal length
+    """
+    pieces = [p.strip() for p in SENTENCE_SPLIT_RE.split(lyrics.strip()) if p.strip()]
+    if chunks <= 1 or len(pieces) <= 1:
+        return [lyrics.strip()]
+    
+    target = sum(len(p) for p in pieces) / chunks
+    parts, current, current_len = [], [], 0
+    for piece in pieces:
+        current.append(piece)
+        current_len += len(piece)
+        if current_len >= target and len(parts) < chunks - 1:
+            parts.append("\n".join(current))
+            current, current_len = [], 0
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Drop a leading ID3v2 tag so MP3 segments can be appended back to back"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return data
+    # Tag size is a 4-byte syncsafe integer (7 bits per byte)
+    size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return data[10 + size + footer:]
+
+
+@functools.lru_cache(maxsize=None)
+def _liburing():
+    """Import liburing on first use (None when it isn't installed)"""
+    try:
+        import liburing
+    except ImportError:
+        return None
+    return liburing
+
+
+def uring_write_all(path, chunks) -> int:
+    """
+    Write an iterable of byte chunks to path with io_uring, submitting
+    URING_BATCH writes per syscall. Returns the number of bytes written.
+    """
+    liburing = _liburing()
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    liburing.io_uring_queue_init(URING_BATCH, ring)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    offset = 0
+    # (offset, chunk) per in-flight write; keeps each buffer alive until reaped
+    pending = []
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            sqe = liburing.io_uring_get_sqe(ring)
+            liburing.io_uring_prep_write(sqe, fd, chunk, offset)
+            sqe.user_data = len(pending)
+            pending.append((offset, chunk))
+            offset += len(chunk)
+            if len(pending) == URING_BATCH:
+                _uring_reap(ring, cqe, fd, pending)
+        _uring_reap(ring, cqe, fd, pending)
+    finally:
+        os.close(fd)
+        liburing.io_uring_queue_exit(ring)
+    return offset
+
+
+def _uring_reap(ring, cqe, fd: int, pending: list):
+    """Submit queued writes and wait for all of them to complete"""
+    if not pending:
+        return
+    liburing = _liburing()
+    liburing.io_uring_submit(ring)
+    for _ in range(len(pending)):
+        liburing.io_uring_wait_cqe(ring, cqe)
+        entry = cqe[0]
+        written = entry.res  # Raises OSError if the write failed
+        chunk_offset, chunk = pending[entry.user_data]
+        liburing.io_uring_cqe_seen(ring, entry)
+        if written < len(chunk):
+            # Short write: finish the remainder synchronously
+            os.pwrite(fd, chunk[written:], chunk_offset + written)
+    pending.clear()
+
+
+_env_loaded = False
+
+
+def load_env():
+    """Load environment variables from .env (once; dotenv is imported on demand)"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def atomic_write_text(path: Path, text: str):
+    """Write text to path via a temp file + os.replace so readers never see partial files"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False
+    ) as f:
+        f.write(text)
+    os.replace(f.name, path)
 
 
 class ElevenLabsSingingGenerator:
     """Generate singing voices from lyrics using Eleven Labs API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, voices_ttl_sec: float = 86400):
         """
         Initialize the Eleven Labs API client
         
         Args:
             api_key: Your Eleven Labs API key. If not provided, 
                      will look for ELEVEN_LABS_API_KEY environment variable
+            voices_ttl_sec: How long the cached voice list stays fresh (default: 24h)
         """
+        self.voices_ttl_sec = voices_ttl_sec
+        # Generated audio, keyed by a hash of the request parameters
+        self.cache_dir = CACHE_DIR / "tts"
+        if not api_key:
+            load_env()
         self.api_key = api_key or os.getenv("ELEVEN_LABS_API_KEY")
         if not self.api_key:
             raise ValueError(
@@ -35,18 +188,89 @@ class ElevenLabsSingingGenerator:
         self.headers = {
             "Accept": "audio/mpeg",
             "Content-Type": "application/json",
-            "xi-api-key": self.api_key
+            "xi-api-key": self.api_key,
+            # Raw MP3 bytes: nothing for iter_content to decompress
+            "Accept-Encoding": "identity"
         }
+        
+        # Imported here so importing the module (or --help) stays fast
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Shared session: keep-alive and TLS reuse across all API calls
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Transient failures are retried, including POST: a failed synthesis
+        # request has produced nothing, so resending it is safe
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                connect=3,
+                read=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "POST"]),
+                respect_retry_after_header=True
+            )
+        )
+        self.session.mount("https://", adapter)
+        
+        # Created lazily by the async methods
+        self._aio_session = None
+        
+        # Disk writes for generate_singing_async_io
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+        # Serializes read-modify-write of the cache index.json across those threads
+        self._cache_index_lock = threading.Lock()
+    
+    def close(self):
+        """Wait for pending disk writes, then release pooled HTTP connections"""
+        self._io_pool.shutdown(wait=True)
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _voices_cache_path(self) -> Path:
+        """Voice list cache file, keyed by a hash of the API key"""
+        key_hash = hashlib.sha1(self.api_key.encode()).hexdigest()[:12]
+        return CACHE_DIR / "voices" / f"{key_hash}.json"
+    
+    def invalidate_voices_cache(self):
+        """Drop the cached voice list so the next lookup hits the API"""
+        try:
+            self._voices_cache_path().unlink()
+        except FileNotFoundError:
+            pass
     
     def get_available_voices(self):
-        """Get list of available voices"""
+        """Get list of available voices (cached on disk for voices_ttl_sec)"""
+        cache_path = self._voices_cache_path()
+        try:
+            if time.time() - cache_path.stat().st_mtime < self.voices_ttl_sec:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass  # Missing or unreadable cache: fetch fresh
+        
         url = f"{self.base_url}/voices"
-        headers = {"xi-api-key": self.api_key}
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = self.session.get(url, headers={"Accept": "application/json"})
+        self._raise_for_status(response)
+        
+        voices = response.json()
+        try:
+            atomic_write_text(cache_path, json.dumps(voices))
+        except OSError:
+            pass  # Caching is best effort
         
-        return response.json()
+        return voices
     
     def generate_singing(
         self,
@@ -75,9 +299,138 @@ class ElevenLabsSingingGenerator:
         Returns:
             Path to the generated audio file
         """
+        self._validate_request(lyrics, voice_id, stability, similarity_boost, style)
+        url = f"{self.base_url}/text-to-speech/{voice_id}"
+        data = self._build_payload(
+            lyrics, model_id, stability, similarity_boost, style, use_speaker_boost
+        )
+        
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Identical lyrics/voice/settings were generated recently: reuse that file
+        params = self._cache_params(voice_id, data)
+        key = self._cache_key(params)
+        cached = self._cached_audio(key)
+        if cached is not None:
+            shutil.copyfile(cached, output_path)
+            print(f"✓ Reused cached audio for identical request: {output_path}")
+            return str(output_path)
+        
+        print(f"Generating singing voice for lyrics...")
+        print(f"Voice ID: {voice_id}")
+        print(f"Model: {model_id}")
+        
+        # Stream the audio straight to disk instead of buffering it in memory
+        with self.session.post(url, json=data, stream=True) as response:
+            self._raise_for_status(response)
+            total_bytes = self._write_stream(response, output_path)
+        
+        self._store_in_cache(key, params, output_path)
+        
+        print(f"✓ Singing audio generated successfully: {output_path}")
+        print(f"✓ File size: {total_bytes / 1024:.2f} KB")
+        
+        return str(output_path)
+    
+    def generate_singing_async_io(
+        self,
+        lyrics: str,
+        voice_id: str,
+        output_path: str = "output_singing.mp3",
+        model_id: str = "eleven_multilingual_v2",
+        stability: float = 0.3,
+        similarity_boost: float = 0.75,
+        style: float = 0.6,
+        use_speaker_boost: bool = True
+    ) -> Future:
+        """
+        Like generate_singing, but return once the API has responded; the
+        audio body is written to disk on a worker thread, so the caller can
+        start the next request while it downloads.
+        
+        Returns:
+            Future resolving to the output path once the MP3 is on disk
+        """
+        self._validate_request(lyrics, voice_id, stability, similarity_boost, style)
         url = f"{self.base_url}/text-to-speech/{voice_id}"
+        data = self._build_payload(
+            lyrics, model_id, stability, similarity_boost, style, use_speaker_boost
+        )
+        
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        params = self._cache_params(voice_id, data)
+        key = self._cache_key(params)
+        cached = self._cached_audio(key)
+        if cached is not None:
+            return self._io_pool.submit(self._copy_cached, cached, output_path)
         
-        data = {
+        response = self.session.post(url, json=data, stream=True)
+        try:
+            self._raise_for_status(response)
+        except Exception:
+            response.close()
+            raise
+        
+        return self._io_pool.submit(self._finish_download, response, output_path, key, params)
+    
+    def _copy_cached(self, cached: Path, output_path: Path) -> str:
+        shutil.copyfile(cached, output_path)
+        return str(output_path)
+    
+    def _finish_download(self, response, output_path: Path, key: str, params: dict) -> str:
+        """Worker-thread half of generate_singing_async_io"""
+        with response:
+            self._write_stream(response, output_path)
+        self._store_in_cache(key, params, output_path)
+        return str(output_path)
+    
+    @staticmethod
+    def _raise_for_status(response):
+        """Like response.raise_for_status(), but include the API's explanation for 4xx errors"""
+        if 400 <= response.status_code < 500:
+            from requests import HTTPError
+            raise HTTPError(
+                f"{response.status_code} {response.reason}: {response.text[:500]}",
+                response=response
+            )
+        response.raise_for_status()
+    
+    @staticmethod
+    def _check01(name: str, value: float):
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"{name} must be in [0,1], got {value}")
+    
+    def _validate_request(
+        self,
+        lyrics: str,
+        voice_id: str,
+        stability: float,
+        similarity_boost: float,
+        style: float
+    ):
+        """Reject requests the API would refuse, before any network round-trip"""
+        if not lyrics or not lyrics.strip():
+            raise ValueError("Lyrics must not be empty")
+        if not voice_id:
+            raise ValueError("voice_id must not be empty")
+        self._check01("stability", stability)
+        self._check01("similarity_boost", similarity_boost)
+        self._check01("style", style)
+    
+    def _build_payload(
+        self,
+        lyrics: str,
+        model_id: str,
+        stability: float,
+        similarity_boost: float,
+        style: float,
+        use_speaker_boost: bool
+    ) -> dict:
+        """Build the text-to-speech request body"""
+        return {
             "text": lyrics,
             "model_id": model_id,
             "voice_settings": {
@@ -87,31 +440,236 @@ class ElevenLabsSingingGenerator:
                 "use_speaker_boost": use_speaker_boost
             }
         }
+    
+    def _cache_params(self, voice_id: str, data: dict) -> dict:
+        """Request parameters that determine the generated audio"""
+        return {
+            "text": data["text"],
+            "voice": voice_id,
+            "model": data["model_id"],
+            "vs": data["voice_settings"]
+        }
+    
+    def _cache_key(self, params: dict) -> str:
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    
+    def _cached_audio(self, key: str) -> Optional[Path]:
+        """Return the cached MP3 for key if it exists and is within TTL"""
+        path = self.cache_dir / f"{key}.mp3"
+        try:
+            if time.time() - path.stat().st_mtime < TTS_CACHE_TTL_SEC:
+                return path
+        except OSError:
+            pass
+        return None
+    
+    def _load_cache_index(self) -> dict:
+        try:
+            with open(self.cache_dir / "index.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _store_in_cache(self, key: str, params: dict, audio_path: Path):
+        """Copy freshly generated audio into the cache (best effort)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Unique temp name: concurrent writers may be storing the same key
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".mp3.tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(audio_path, tmp_path)
+                os.replace(tmp_path, self.cache_dir / f"{key}.mp3")
+            except OSError:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            
+            # Human-readable index of what each cache entry contains
+            with self._cache_index_lock:
+                index = self._load_cache_index()
+                index[key] = {"created": time.time(), "ttl": TTS_CACHE_TTL_SEC, "params": params}
+                atomic_write_text(self.cache_dir / "index.json", json.dumps(index, indent=2))
+        except OSError as e:
+            print(f"⚠️  Could not cache audio: {e}")
+    
+    def prune_cache(self, max_age: float = TTS_CACHE_TTL_SEC) -> int:
+        """
+        Delete cached audio older than max_age seconds
         
-        print(f"Generating singing voice for lyrics...")
-        print(f"Voice ID: {voice_id}")
-        print(f"Model: {model_id}")
+        Returns:
+            Number of cache entries removed
+        """
+        removed = 0
+        now = time.time()
+        with self._cache_index_lock:
+            index = self._load_cache_index()
+            for path in self.cache_dir.glob("*.mp3"):
+                try:
+                    if now - path.stat().st_mtime >= max_age:
+                        path.unlink()
+                        index.pop(path.stem, None)
+                        removed += 1
+                except OSError:
+                    pass
+            if removed:
+                atomic_write_text(self.cache_dir / "index.json", json.dumps(index, indent=2))
+        return removed
+    
+    async def _ensure_session(self):
+        """Create the aiohttp session on first use (it must be made inside a running loop)"""
+        if self._aio_session is None or self._aio_session.closed:
+            import aiohttp
+            self._aio_session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+            )
+        return self._aio_session
+    
+    async def aclose(self):
+        """Close the aiohttp session used by the async methods"""
+        if self._aio_session is not None:
+            await self._aio_session.close()
+            self._aio_session = None
+    
+    async def agenerate_singing(
+        self,
+        lyrics: str,
+        voice_id: str,
+        output_path: str = "output_singing.mp3",
+        model_id: str = "eleven_multilingual_v2",
+        stability: float = 0.3,
+        similarity_boost: float = 0.75,
+        style: float = 0.6,
+        use_speaker_boost: bool = True
+    ) -> str:
+        """
+        Async version of generate_singing (requires aiohttp and aiofiles)
         
-        response = requests.post(url, json=data, headers=self.headers)
-        response.raise_for_status()
+        Returns:
+            Path to the generated audio file
+        """
+        import aiofiles
+        
+        self._validate_request(lyrics, voice_id, stability, similarity_boost, style)
+        session = await self._ensure_session()
+        url = f"{self.base_url}/text-to-speech/{voice_id}"
+        data = self._build_payload(
+            lyrics, model_id, stability, similarity_boost, style, use_speaker_boost
+        )
         
-        # Save the audio file
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        async with session.post(url, json=data) as response:
+            response.raise_for_status()
+            async with aiofiles.open(output_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    await f.write(chunk)
         
         print(f"✓ Singing audio generated successfully: {output_path}")
-        print(f"✓ File size: {len(response.content) / 1024:.2f} KB")
+        return str(output_path)
+    
+    async def agenerate_many(self, jobs: list, concurrency: int = 4) -> list:
+        """
+        Run several agenerate_singing jobs concurrently
+        
+        Args:
+            jobs: List of keyword-argument dicts for agenerate_singing
+            concurrency: Maximum number of requests in flight at once
+        
+        Returns:
+            Output paths, in the same order as jobs
+        """
+        import asyncio
+        
+        sem = asyncio.Semaphore(concurrency)
+        
+        async def _one(job):
+            async with sem:
+                return await self.agenerate_singing(**job)
+        
+        return await asyncio.gather(*(_one(job) for job in jobs))
+    
+    def generate_singing_parallel(
+        self,
+        lyrics: str,
+        voice_id: str,
+        output_path: str = "output_singing.mp3",
+        chunks: int = 4,
+        **kwargs
+    ) -> str:
+        """
+        Generate long lyrics faster by synthesizing sentence-aligned chunks
+        concurrently and concatenating the MP3s (costs one API call per chunk)
+        
+        Prosody can reset at chunk boundaries, which is why splits only happen
+        at sentence or line ends.
+        
+        Args:
+            lyrics: The lyrics text to convert to singing
+            voice_id: ID of the voice to use
+            output_path: Path where the audio file will be saved
+            chunks: Maximum number of concurrent requests / segments
+            **kwargs: Additional arguments for agenerate_singing
+        
+        Returns:
+            Path to the generated audio file
+        """
+        import asyncio
+        
+        parts = _split_lyrics(lyrics, chunks)
+        print(f"Generating {len(parts)} segments concurrently...")
+        
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jobs = [
+                dict(
+                    lyrics=part,
+                    voice_id=voice_id,
+                    output_path=str(Path(tmp_dir) / f"segment_{i}.mp3"),
+                    **kwargs
+                )
+                for i, part in enumerate(parts)
+            ]
+            segments = asyncio.run(self._agenerate_and_close(jobs, len(parts)))
+            
+            # MPEG frames are self-synchronizing, so segments can be byte-appended
+            # once the ID3 tags of all but the first are dropped
+            with open(output_path, "wb") as out:
+                for i, segment in enumerate(segments):
+                    data = Path(segment).read_bytes()
+                    out.write(data if i == 0 else strip_id3(data))
+        
+        print(f"✓ Singing audio generated successfully: {output_path}")
         return str(output_path)
     
+    async def _agenerate_and_close(self, jobs: list, concurrency: int) -> list:
+        try:
+            return await self.agenerate_many(jobs, concurrency=concurrency)
+        finally:
+            await self.aclose()
+    
+    def _write_stream(self, response, output_path: Path) -> int:
+        """Write a streamed response body to output_path; returns bytes written"""
+        if USE_URING and _liburing() is not None:
+            return uring_write_all(output_path, response.iter_content(chunk_size=URING_CHUNK_SIZE))
+        
+        total_bytes = 0
+        with open(output_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    total_bytes += len(chunk)
+        return total_bytes
+    
     def generate_from_file(
         self,
         lyrics_file: str,
         voice_id: str,
         output_path: Optional[str] = None,
+        parallel: int = 1,
         **kwargs
     ) -> str:
         """
@@ -121,6 +679,7 @@ class ElevenLabsSingingGenerator:
             lyrics_file: Path to text file containing lyrics
             voice_id: ID of the voice to use
             output_path: Output path (if None, will use lyrics filename)
+            parallel: If > 1, synthesize up to this many chunks concurrently
             **kwargs: Additional arguments for generate_singing
         
         Returns:
@@ -130,19 +689,49 @@ class ElevenLabsSingingGenerator:
         if not lyrics_path.exists():
             raise FileNotFoundError(f"Lyrics file not found: {lyrics_file}")
         
-        with open(lyrics_path, "r", encoding="utf-8") as f:
-            lyrics = f.read()
+        if lyrics_path.stat().st_size > MMAP_THRESHOLD:
+            with open(lyrics_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lyrics = mm[:].decode("utf-8")
+        else:
+            lyrics = lyrics_path.read_text(encoding="utf-8")
+        # Normalize once here so the request body is as small as possible
+        lyrics = lyrics.replace("\r\n", "\n").strip()
+        
+        if parallel <= 1 and len(lyrics) > MAX_TTS_CHARS:
+            raise ValueError(
+                f"Lyrics are {len(lyrics)} characters; a single request allows "
+                f"{MAX_TTS_CHARS}. Shorten them or use --parallel to split them."
+            )
         
         if output_path is None:
             output_path = lyrics_path.stem + "_singing.mp3"
         
+        if parallel > 1:
+            return self.generate_singing_parallel(
+                lyrics, voice_id, output_path, chunks=parallel, **kwargs
+            )
         return self.generate_singing(lyrics, voice_id, output_path, **kwargs)
 
 
+async def _run_batch(generator, batch_file: str, default_voice_id: str, concurrency: int) -> list:
+    """Generate every job in a JSONL file (one agenerate_singing kwargs dict per line)"""
+    with open(batch_file, "r", encoding="utf-8") as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    for job in jobs:
+        job.setdefault("voice_id", default_voice_id)
+    
+    try:
+        return await generator.agenerate_many(jobs, concurrency=concurrency)
+    finally:
+        await generator.aclose()
+
+
 def main():
     """Example usage"""
     import argparse
     
+    load_env()
+    
     parser = argparse.ArgumentParser(
         description="Generate singing voice from lyrics using Eleven Labs API"
     )
@@ -162,6 +751,24 @@ def main():
         required=True,
         help="Voice ID to use (run with --list-voices to see available voices)"
     )
+    parser.add_argument(
+        "--batch-file",
+        type=str,
+        help="JSONL file of jobs ({\"lyrics\": ..., \"output_path\": ...}) to generate concurrently"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum concurrent requests for --batch-file (default: 4)"
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Split long lyrics at sentence boundaries and synthesize N chunks concurrently"
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -173,6 +780,11 @@ def main():
         action="store_true",
         help="List available voices and exit"
     )
+    parser.add_argument(
+        "--refresh-voices",
+        action="store_true",
+        help="Ignore the cached voice list and fetch it again"
+    )
     parser.add_argument(
         "--api-key",
         type=str,
@@ -207,6 +819,8 @@ def main():
     
     try:
         generator = ElevenLabsSingingGenerator(api_key=args.api_key)
+        if args.refresh_voices:
+            generator.invalidate_voices_cache()
         
         if args.list_voices:
             voices = generator.get_available_voices()
@@ -220,6 +834,15 @@ def main():
                 print("-" * 80)
             return
         
+        if args.batch_file:
+            import asyncio
+            
+            outputs = asyncio.run(
+                _run_batch(generator, args.batch_file, args.voice_id, args.concurrency)
+            )
+            print(f"\n🎵 Success! Generated {len(outputs)} files")
+            return 0
+        
         if not args.lyrics and not args.lyrics_file:
             parser.error("Either --lyrics or --lyrics-file must be provided")
         
@@ -228,6 +851,18 @@ def main():
                 args.lyrics_file,
                 args.voice_id,
                 args.output,
+                parallel=args.parallel,
+                model_id=args.model,
+                stability=args.stability,
+                similarity_boost=args.similarity,
+                style=args.style
+            )
+        elif args.parallel > 1:
+            output = generator.generate_singing_parallel(
+                args.lyrics,
+                args.voice_id,
+                args.output,
+                chunks=args.parallel,
                 model_id=args.model,
                 stability=args.stability,
                 similarity_boost=args.similarity,
@@ -3,30 +3,67 @@
 Interactive conversational agent for creating and generating singing voices
 """
 
+import hashlib
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+from generate_singing import CACHE_DIR, ElevenLabsSingingGenerator, atomic_write_text, load_env
 
-from generate_singing import ElevenLabsSingingGenerator
+SEP_EQ = "=" * 60
+SEP_DASH = "-" * 60
+BANNER = f"{SEP_EQ}\n🎵 INTERACTIVE SINGING VOICE GENERATOR 🎵\n{SEP_EQ}\n"
+
+# Eleven Labs voice IDs are long alphanumeric strings
+VOICE_ID_RE = re.compile(r"^[0-9a-zA-Z]{20,}$")
+
+# One entry in the voice listing
+VOICE_TEMPLATE = "{star}{idx}. {name} ({category})\n      ID: {voice_id}"
+
+# Fast, inexpensive default; override with --model
+DEFAULT_LYRICS_MODEL = "gpt-4o-mini"
+
+LYRICIST_PROMPT = """You are a creative lyricist. Generate {style} lyrics based on the user's request. 
+Keep it appropriate, creative, and singable. Format with proper line breaks and verses."""
+
+EDITOR_PROMPT = """You are a lyricist editor. Improve the given lyrics by:
+- Making them more singable and rhythmic
+- Fixing grammar/flow issues
+- Keeping the original intent and meaning
+- Not changing much if they're already good
+Return only the improved lyrics."""
 
 
 class LyricsConversationAgent:
     """Interactive agent to help create lyrics and generate singing voice"""
     
-    def __init__(self, use_ai: bool = False, openai_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        use_ai: bool = False,
+        openai_api_key: Optional[str] = None,
+        model: str = DEFAULT_LYRICS_MODEL
+    ):
         """
         Initialize the conversation agent
         
         Args:
             use_ai: Whether to use AI (OpenAI) to help generate lyrics
             openai_api_key: OpenAI API key if using AI assistance
+            model: OpenAI chat model used for lyrics
         """
         self.use_ai = use_ai
+        self.model = model
         self.openai_client = None
+        self._last_voice_id = None
+        self._music_generator = None
+        self._voices_future = None
+        
+        # Identical prompts return the cached completion instead of a new API call
+        self._llm_cache_dir = CACHE_DIR / "llm"
+        self._llm_cache_enabled = os.getenv("LISTENHACKS_NO_LLM_CACHE") != "1"
         
         if use_ai:
             try:
@@ -46,26 +83,84 @@ class LyricsConversationAgent:
                 print("   Continuing without AI assistance...\n")
                 self.use_ai = False
     
+    def _llm_cache_path(
+        self, model: str, system_prompt: str, prompt: str, temperature: float, max_tokens: int
+    ) -> Path:
+        key = hashlib.sha1(
+            repr((model, system_prompt, prompt, temperature, max_tokens)).encode()
+        ).hexdigest()
+        return self._llm_cache_dir / f"{key}.txt"
+    
+    def _llm_cache_get(self, cache_path: Path) -> Optional[str]:
+        if not self._llm_cache_enabled:
+            return None
+        try:
+            # Empty entries written by older versions count as misses
+            return cache_path.read_text(encoding="utf-8") or None
+        except OSError:
+            return None
+    
+    def _llm_cache_put(self, cache_path: Path, content: str):
+        if not self._llm_cache_enabled:
+            return
+        try:
+            atomic_write_text(cache_path, content)
+        except OSError:
+            pass  # Caching is best effort
+    
+    def _chat_completion(
+        self,
+        system_prompt: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: int = 500
+    ) -> str:
+        """
+        Run a chat completion, printing tokens as they stream in.
+        Repeated inputs are served from the on-disk cache (printed the same way),
+        so callers never need to display the result again.
+        """
+        cache_path = self._llm_cache_path(
+            self.model, system_prompt, prompt, temperature, max_tokens
+        )
+        cached = self._llm_cache_get(cache_path)
+        if cached is not None:
+            print(cached)
+            return cached
+        
+        response = self.openai_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        parts = []
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                print(delta, end="", flush=True)
+                parts.append(delta)
+        print()
+        content = "".join(parts).strip()
+        
+        # An empty reply (content filter, dropped stream) must not stick as a cache hit
+        if content:
+            self._llm_cache_put(cache_path, content)
+        return content
+    
     def ai_generate_lyrics(self, prompt: str, style: str = "song") -> str:
         """Use AI to generate lyrics based on prompt"""
         if not self.use_ai or not self.openai_client:
             return ""
         
         try:
-            system_prompt = f"""You are a creative lyricist. Generate {style} lyrics based on the user's request. 
-Keep it appropriate, creative, and singable. Format with proper line breaks and verses."""
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=500
+            return self._chat_completion(
+                LYRICIST_PROMPT.format(style=style), prompt, temperature=0.8
             )
-            
-            return response.choices[0].message.content.strip()
         except Exception as e:
             print(f"⚠️  AI generation failed: {e}")
             return ""
@@ -75,34 +170,30 @@ Keep it appropriate, creative, and singable. Format with proper line breaks and
         if not self.use_ai or not self.openai_client:
             return lyrics
         
+        # Too little to improve; not worth a billable round-trip
+        stripped = lyrics.strip()
+        if len(stripped) < 20 or stripped.count("\n") < 2:
+            print("(Too short to improve, keeping your draft)")
+            return lyrics
+        
         try:
-            system_prompt = """You are a lyricist editor. Improve the given lyrics by:
-- Making them more singable and rhythmic
-- Fixing grammar/flow issues
-- Keeping the original intent and meaning
-- Not changing much if they're already good
-Return only the improved lyrics."""
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": lyrics}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            return response.choices[0].message.content.strip()
+            return self._chat_completion(EDITOR_PROMPT, lyrics, temperature=0.7)
         except Exception as e:
             print(f"⚠️  AI improvement failed: {e}")
             return lyrics
     
+    def _ensure_music_generator(self):
+        """Create the Music API generator on first use and reuse it for later songs"""
+        if self._music_generator is None:
+            from generate_music import ElevenLabsMusicGenerator
+            self._music_generator = ElevenLabsMusicGenerator()
+        return self._music_generator
+    
     def get_multiline_input(self, prompt: str) -> str:
         """Get multiline input from user"""
         print(prompt)
         print("(Type your lyrics below. When done, enter a line with just 'DONE')")
-        print("-" * 60)
+        print(SEP_DASH)
         
         lines = []
         while True:
@@ -118,17 +209,19 @@ Return only the improved lyrics."""
     
     def display_lyrics(self, lyrics: str):
         """Display lyrics in a nice format"""
-        print("\n" + "=" * 60)
-        print("YOUR LYRICS:")
-        print("=" * 60)
-        print(lyrics)
-        print("=" * 60 + "\n")
+        body = ["", SEP_EQ, "YOUR LYRICS:", SEP_EQ, lyrics, SEP_EQ, ""]
+        sys.stdout.write("\n".join(body) + "\n")
     
     def get_voice_choice(self, generator: ElevenLabsSingingGenerator) -> Optional[str]:
         """Let user choose a voice"""
         try:
             print("📋 Fetching available voices...")
-            voices_data = generator.get_available_voices()
+            if self._voices_future is not None:
+                # Prefetched while the user was writing lyrics
+                voices_data = self._voices_future.result()
+                self._voices_future = None
+            else:
+                voices_data = generator.get_available_voices()
             voices = voices_data.get("voices", [])
             
             if not voices:
@@ -138,20 +231,27 @@ Return only the improved lyrics."""
             # Recommend specific voices for more expressive delivery
             recommended = ['cgSgspJ2msm6clMCkdW9', 'pFZP5JQG7iQjIQuC4Bku', 'EXAVITQu4vr4xnSDxMaL']
             
-            print("\n⚠️  NOTE: Eleven Labs does TEXT-TO-SPEECH (speaking lyrics with emotion),")
-            print("   not true singing synthesis. For actual singing, try Suno AI or Udio.")
-            print("   We'll use the most expressive voices for best results.\n")
-            
-            print("\n🎤 Available Voices (⭐ = Recommended for expressive delivery):")
-            print("-" * 60)
+            lines = [
+                "",
+                "⚠️  NOTE: Eleven Labs does TEXT-TO-SPEECH (speaking lyrics with emotion),",
+                "   not true singing synthesis. For actual singing, try Suno AI or Udio.",
+                "   We'll use the most expressive voices for best results.",
+                "",
+                "",
+                "🎤 Available Voices (⭐ = Recommended for expressive delivery):",
+                SEP_DASH,
+            ]
             for idx, voice in enumerate(voices, 1):
-                name = voice.get('name', 'Unknown')
                 voice_id = voice.get('voice_id', '')
-                category = voice.get('category', 'N/A')
-                star = "⭐ " if voice_id in recommended else "   "
-                print(f"{star}{idx}. {name} ({category})")
-                print(f"      ID: {voice_id}")
-            print("-" * 60)
+                lines.append(VOICE_TEMPLATE.format(
+                    star="⭐ " if voice_id in recommended else "   ",
+                    idx=idx,
+                    name=voice.get('name', 'Unknown'),
+                    category=voice.get('category', 'N/A'),
+                    voice_id=voice_id
+                ))
+            lines.append(SEP_DASH)
+            sys.stdout.write("\n".join(lines) + "\n")
             
             while True:
                 choice = input(f"\nChoose a voice (1-{len(voices)}) or enter voice ID directly: ").strip()
@@ -163,20 +263,29 @@ Return only the improved lyrics."""
                         return voices[idx]['voice_id']
                     else:
                         print(f"Invalid choice. Please enter 1-{len(voices)}")
-                else:
-                    # Assume it's a voice ID
+                elif VOICE_ID_RE.match(choice):
                     return choice
+                else:
+                    print("That doesn't look like a voice ID. Enter a number or a full voice ID.")
                     
         except Exception as e:
             print(f"❌ Error fetching voices: {e}")
             return None
     
-    def run_conversation(self):
-        """Run the interactive conversation"""
-        print("=" * 60)
-        print("🎵 INTERACTIVE SINGING VOICE GENERATOR 🎵")
-        print("=" * 60)
-        print("\nWelcome! I'll help you create lyrics and generate singing.")
+    def run_conversation(self, generator: ElevenLabsSingingGenerator):
+        """Run the interactive conversation, reusing one generator for every song"""
+        sys.stdout.write(BANNER + "\nWelcome! I'll help you create lyrics and generate singing.\n")
+        
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # Fetch voices in the background while the user works on lyrics
+            self._voices_future = pool.submit(generator.get_available_voices)
+            
+            # Loop rather than recurse so long sessions keep a constant stack depth
+            while self._create_song(generator):
+                print("\n\n")
+    
+    def _create_song(self, generator: ElevenLabsSingingGenerator) -> bool:
+        """Walk through creating one song. Returns True if the user wants another."""
         print()
         
         # Choose mode: TTS or Music
@@ -207,9 +316,9 @@ Return only the improved lyrics."""
         print(f"\n✓ Great! A {mood} song about {song_about}")
         
         # Step 2: Get or generate lyrics
-        print("\n" + "=" * 60)
+        print("\n" + SEP_EQ)
         print("LYRICS CREATION")
-        print("=" * 60)
+        print(SEP_EQ)
         print("\nHow would you like to create your lyrics?")
         print("1. I'll write them myself")
         if self.use_ai:
@@ -226,13 +335,12 @@ Return only the improved lyrics."""
         
         elif choice == "2" and self.use_ai:
             # AI generation
-            print("\n🤖 Generating lyrics with AI...")
+            print("\n🤖 Generating lyrics with AI...\n")
             prompt = f"Write {mood} song lyrics about {song_about}. Keep it short (2-4 verses)."
             lyrics = self.ai_generate_lyrics(prompt, mood)
             if lyrics:
-                self.display_lyrics(lyrics)
-                
-                edit = input("Would you like to edit these lyrics? (y/n) ").strip().lower()
+                # Already on screen from streaming
+                edit = input("\nWould you like to edit these lyrics? (y/n) ").strip().lower()
                 if edit == 'y':
                     print("\nEnter your edited version:")
                     lyrics = self.get_multiline_input("📝 Enter your lyrics:")
@@ -245,16 +353,16 @@ Return only the improved lyrics."""
             lyrics = self.get_multiline_input("\n📝 Enter your draft lyrics:")
             
             print("\n🤖 AI is improving your lyrics...")
-            improved = self.ai_improve_lyrics(lyrics)
-            
             print("\n--- ORIGINAL ---")
             print(lyrics)
             print("\n--- AI IMPROVED ---")
-            print(improved)
+            # The improved version streams in below the header
+            improved = self.ai_improve_lyrics(lyrics)
             
-            use_improved = input("\nUse AI improved version? (y/n) ").strip().lower()
-            if use_improved == 'y':
-                lyrics = improved
+            if improved != lyrics:
+                use_improved = input("\nUse AI improved version? (y/n) ").strip().lower()
+                if use_improved == 'y':
+                    lyrics = improved
         
         else:
             # Fallback to manual
@@ -262,7 +370,7 @@ Return only the improved lyrics."""
         
         if not lyrics.strip():
             print("\n❌ No lyrics entered. Exiting.")
-            return
+            return False
         
         # Display final lyrics
         self.display_lyrics(lyrics)
@@ -271,25 +379,19 @@ Return only the improved lyrics."""
         confirm = input("Ready to generate? (y/n) ").strip().lower()
         if confirm != 'y':
             print("\n👋 Okay, maybe next time!")
-            return
+            return False
         
         # Step 3: Initialize generator based on mode
-        print("\n" + "=" * 60)
+        print("\n" + SEP_EQ)
         print("GENERATION SETUP")
-        print("=" * 60)
+        print(SEP_EQ)
         
+        if use_music_api:
             try:
-                generator = ElevenLabsSingingGenerator()
-            except ValueError as e:
+                music_generator = self._ensure_music_generator()
+            except (ValueError, ImportError) as e:
                 print(f"\n❌ {e}")
-                print("\nPlease set your Eleven Labs API key:")
-                print("  export ELEVEN_LABS_API_KEY='your_api_key'")
-                    print(f"\n❌ {e}")
-                return
-            except ImportError as e:
-                print(f"\n❌ {e}")
-                print("Install with: pip install elevenlabs")
-                return
+                return False
             
             print("\n🎼 Music Settings:")
             genre = input("Genre (pop, rock, jazz, country, electronic, etc., default: pop): ").strip() or "pop"
@@ -307,12 +409,12 @@ Return only the improved lyrics."""
                 output += '.mp3'
             
             # Generate music
-            print("\n" + "=" * 60)
+            print("\n" + SEP_EQ)
             print("🎵 GENERATING MUSIC WITH SINGING...")
-            print("=" * 60)
+            print(SEP_EQ)
             
             try:
-                output_path = generator.generate_music_from_lyrics(
+                output_path = music_generator.generate_music_from_lyrics(
                     lyrics=lyrics,
                     output_path=output,
                     genre=genre,
@@ -321,34 +423,33 @@ Return only the improved lyrics."""
                     music_length_ms=length_ms
                 )
                 
-                print("\n" + "=" * 60)
+                print("\n" + SEP_EQ)
                 print("✨ SUCCESS! ✨")
-                print("=" * 60)
+                print(SEP_EQ)
                 print(f"\n🎵 Your music with singing is ready: {output_path}")
                 print(f"\nTo play it:")
                 print(f"  open {output_path}  # macOS")
                 
             except Exception as e:
                 print(f"\n❌ Error generating music: {e}")
-                return
+                return False
             
         else:
             # Text-to-Speech mode (original)
-        
-        try:
-            generator = ElevenLabsSingingGenerator()
-        except ValueError as e:
-            print(f"\n❌ {e}")
-            print("\nPlease set your Eleven Labs API key:")
-            print("  export ELEVEN_LABS_API_KEY='your_api_key'")
-            return
             
             # Step 4: Choose voice
-            voice_id = self.get_voice_choice(generator)
+            voice_id = None
+            if self._last_voice_id:
+                same = input(f"Use previous voice {self._last_voice_id}? (y/n) ").strip().lower()
+                if same == 'y':
+                    voice_id = self._last_voice_id
+            if not voice_id:
+                voice_id = self.get_voice_choice(generator)
             if not voice_id:
                 print("\n❌ No voice selected. Exiting.")
-                return
+                return False
             
+            self._last_voice_id = voice_id
             print(f"\n✓ Voice selected: {voice_id}")
             
             # Step 5: Choose output filename
@@ -365,21 +466,21 @@ Return only the improved lyrics."""
             print("   💡 TIP: Higher style = more expressive/emotional delivery")
             try:
                 stability = input("Stability (0.0-1.0, default: 0.3 for more variation): ").strip()
-                stability = float(stability) if stability else 0.3
+                stability = max(0.0, min(1.0, float(stability))) if stability else 0.3
                 
                 similarity = input("Similarity (0.0-1.0, default: 0.75): ").strip()
-                similarity = float(similarity) if similarity else 0.75
+                similarity = max(0.0, min(1.0, float(similarity))) if similarity else 0.75
                 
                 style = input("Style/Expression (0.0-1.0, default: 0.6 for expressive): ").strip()
-                style = float(style) if style else 0.6
+                style = max(0.0, min(1.0, float(style))) if style else 0.6
             except ValueError:
                 print("⚠️  Invalid input, using optimized defaults")
                 stability, similarity, style = 0.3, 0.75, 0.6
             
             # Step 7: Generate!
-            print("\n" + "=" * 60)
+            print("\n" + SEP_EQ)
             print("🎵 GENERATING VOICE...")
-            print("=" * 60)
+            print(SEP_EQ)
             
             try:
                 output_path = generator.generate_singing(
@@ -391,38 +492,42 @@ Return only the improved lyrics."""
                     style=style
                 )
                 
-                print("\n" + "=" * 60)
+                print("\n" + SEP_EQ)
                 print("✨ SUCCESS! ✨")
-                print("=" * 60)
+                print(SEP_EQ)
                 print(f"\n🎵 Your audio is ready: {output_path}")
                 print(f"\nTo play it:")
                 print(f"  open {output_path}  # macOS")
                 
             except Exception as e:
                 print(f"\n❌ Error generating audio: {e}")
-                return
+                return False
         
-        # Save lyrics for reference
-        with open("lyrics_history.txt", "a", encoding="utf-8") as f:
-            f.write("\n" + "=" * 60 + "\n")
-            f.write(f"Generated: {output_path if 'output_path' in locals() else 'unknown'}\n")
-            f.write(f"Mode: {'Music API' if use_music_api else 'Text-to-Speech'}\n")
-            f.write("=" * 60 + "\n")
-            f.write(lyrics)
-            f.write("\n" + "=" * 60 + "\n\n")
+        # Save lyrics for reference (one O_APPEND write so concurrent sessions don't interleave)
+        record = (
+            f"\n{SEP_EQ}\n"
+            f"Generated: {output_path if 'output_path' in locals() else 'unknown'}\n"
+            f"Mode: {'Music API' if use_music_api else 'Text-to-Speech'}\n"
+            f"{SEP_EQ}\n{lyrics}\n{SEP_EQ}\n\n"
+        )
+        fd = os.open("lyrics_history.txt", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, record.encode("utf-8"))
+        finally:
+            os.close(fd)
         
         # Ask if they want to generate another
-        print("\n" + "=" * 60)
+        print("\n" + SEP_EQ)
         another = input("\n🎤 Generate another song? (y/n) ").strip().lower()
-        if another == 'y':
-            print("\n\n")
-            self.run_conversation()
+        return another == 'y'
 
 
 def main():
     """Main entry point"""
     import argparse
     
+    load_env()
+    
     parser = argparse.ArgumentParser(
         description="Interactive agent for creating and generating singing voices"
     )
@@ -436,13 +541,31 @@ def main():
         type=str,
         help="OpenAI API key (or set OPENAI_API_KEY env variable)"
     )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=DEFAULT_LYRICS_MODEL,
+        help=f"OpenAI model for lyrics (default: {DEFAULT_LYRICS_MODEL})"
+    )
     
     args = parser.parse_args()
     
-    agent = LyricsConversationAgent(use_ai=args.ai, openai_api_key=args.openai_key)
+    agent = LyricsConversationAgent(
+        use_ai=args.ai, openai_api_key=args.openai_key, model=args.model
+    )
+    
+    # One generator (and HTTP connection pool) for the whole session
+    try:
+        generator = ElevenLabsSingingGenerator()
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        print("\nPlease set your Eleven Labs API key:")
+        print("  export ELEVEN_LABS_API_KEY='your_api_key'")
+        return 1
     
     try:
-        agent.run_conversation()
+        with generator:
+            agent.run_conversation(generator)
     except KeyboardInterrupt:
         print("\n\n👋 Goodbye!")
         return 0
@@ -4,14 +4,84 @@ Generate singing voice from lyrics using Eleven Labs Singing Voices API
 Fixed version that uses actual singing voices, not speech voices
 """
 
+import asyncio
+import hashlib
+import json
+import mmap
 import os
+import re
+import shutil
+import threading
+import time
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from generate_singing import strip_id3
+
+try:
+    import orjson
+
+    def _dumps_body(obj) -> bytes:
+        # Encodes straight to bytes, several times faster than json
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps_body(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 load_dotenv()
 
+# Chunk size for streaming generated audio to disk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Retry policy for segment requests in generate_from_file_async
+SEGMENT_RETRIES = 4
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# generate_singing attempts a fast POST first and doubles the read timeout on
+# each retry, so a hung connection fails quickly without cutting off slow renders
+POST_ATTEMPTS = 3
+CONNECT_TIMEOUT_S = 5
+INITIAL_READ_TIMEOUT_S = 10
+
+# How long the filtered singing-voice list is served from cache
+VOICES_TTL_SEC = 3600
+
+# Endings that already mark a phrase break in lyrics
+_PUNCT_END = (".", "!", "?", ",")
+
+# Lyrics files above this size are read through mmap
+MMAP_THRESHOLD = 1 << 20
+
+# Blank lines separate stanzas
+STANZA_SPLIT_RE = re.compile(r"\n\s*\n")
+
+
+class _RequestPool:
+    """
+    Runs generate_singing jobs on a fixed set of worker threads that share the
+    generator's Session. submit() never blocks: jobs queue until a worker is
+    free, and the worker count caps requests in flight at the API rate limit.
+    """
+    
+    def __init__(self, generator: "ElevenLabsSingingGenerator", max_workers: int = 8):
+        self._generator = generator
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="singing"
+        )
+    
+    def submit(self, text: str, settings: dict) -> Future:
+        """Queue one generate_singing(text, **settings) call"""
+        return self._executor.submit(self._generator.generate_singing, text, **settings)
+    
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
 
 class ElevenLabsSingingGenerator:
     """Generate singing voices from lyrics using Eleven Labs Singing Voices"""
@@ -25,14 +95,29 @@ class ElevenLabsSingingGenerator:
         "eleven_multilingual_sting": "JBFqnCBsd6RMkjVDRZzb",  # Versatile male
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_dir: str = "~/.cache/elevenlabs",
+        use_cache: bool = True
+    ):
         """
         Initialize the Eleven Labs API client
         
         Args:
             api_key: Your Eleven Labs API key. If not provided, 
                      will look for ELEVEN_LABS_API_KEY environment variable
+            cache_dir: Directory for generated audio, keyed by request parameters
+            use_cache: Reuse previously generated audio for identical requests
         """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.use_cache = use_cache
+        # (timestamp, singing voice entries) from the last /voices lookup
+        self._voices_cache = None
+        # Created by generate_many on first use
+        self._pool = None
+        # Directories already created, so batches don't mkdir for every file
+        self._ensured_dirs = set()
         self.api_key = api_key or os.getenv("ELEVEN_LABS_API_KEY")
         if not self.api_key:
             raise ValueError(
@@ -46,31 +131,112 @@ class ElevenLabsSingingGenerator:
             "Content-Type": "application/json",
             "xi-api-key": self.api_key
         }
-    
-    def list_singing_voices(self):
-        """Get list of all available voices including singing voices"""
-        url = f"{self.base_url}/voices"
-        headers = {"xi-api-key": self.api_key}
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        # Pooled keep-alive connections shared by every request (and batch worker)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=50,
+            max_retries=Retry(
+                total=5,
+                # Read timeouts go straight to _post_with_retries, which owns the
+                # growing timeout; retrying them here re-POSTs at the same timeout
+                read=False,
+                backoff_factor=1.0,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["POST", "GET"],
+                respect_retry_after_header=True
+            )
+        )
+        self.session.mount("https://", adapter)
+    
+    def close(self):
+        """Finish queued generate_many jobs, then release pooled HTTP connections"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _ensure_dir(self, path: Path):
+        if path not in self._ensured_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(path)
+    
+    def list_singing_voices(self, refresh: bool = False):
+        """
+        Get list of all available voices including singing voices
+        (cached in memory and on disk for VOICES_TTL_SEC)
         
-        voices = response.json().get("voices", [])
+        Args:
+            refresh: Ignore the cache and query the API
+        """
+        singing = None if refresh else self._cached_singing_voices()
         
-        # Filter and display voices
-        singing_voices = {}
-        for voice in voices:
-            voice_id = voice.get("voice_id")
-            name = voice.get("name")
-            category = voice.get("category", "")
+        if singing is None:
+            url = f"{self.base_url}/voices"
+            
+            response = self.session.get(url, headers={"Accept": "application/json"})
+            response.raise_for_status()
+            
+            voices = response.json().get("voices", [])
             
             # Look for singing-related voices
-            if "singing" in category.lower() or "singer" in name.lower():
-                singing_voices[name] = voice_id
-                print(f"Found: {name} (ID: {voice_id}) - Category: {category}")
+            singing = [
+                {"name": v.get("name"), "voice_id": v.get("voice_id"), "category": v.get("category", "")}
+                for v in voices
+                if "singing" in v.get("category", "").casefold()
+                or "singer" in v.get("name", "").casefold()
+            ]
+            
+            ts = time.time()
+            cache_path = self._voices_cache_path()
+            self._voices_cache = (cache_path, ts, singing)
+            try:
+                self._ensure_dir(self.cache_dir)
+                tmp_path = cache_path.with_suffix(".json.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"ts": ts, "voices": singing}, f)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass  # Caching is best effort
+        
+        # Display voices
+        singing_voices = {}
+        for voice in singing:
+            singing_voices[voice["name"]] = voice["voice_id"]
+            print(f"Found: {voice['name']} (ID: {voice['voice_id']}) - Category: {voice['category']}")
         
         return singing_voices
     
+    def _voices_cache_path(self) -> Path:
+        """Voice list cache file, keyed by a hash of the API key"""
+        key_hash = hashlib.sha1(self.api_key.encode()).hexdigest()[:12]
+        return self.cache_dir / f"voices-{key_hash}.json"
+    
+    def _cached_singing_voices(self) -> Optional[list]:
+        """Singing voice entries for this API key from memory or disk, if still fresh"""
+        cache_path = self._voices_cache_path()
+        # The in-memory copy is tagged with its file, so it only serves the same key
+        if self._voices_cache is None or self._voices_cache[0] != cache_path:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                self._voices_cache = (cache_path, cached["ts"], cached["voices"])
+            except (OSError, ValueError, KeyError):
+                return None
+        
+        _, ts, singing = self._voices_cache
+        if time.time() - ts < VOICES_TTL_SEC:
+            return singing
+        return None
+    
     def generate_singing(
         self,
         lyrics: str,
@@ -107,16 +273,30 @@ class ElevenLabsSingingGenerator:
         # Break into lines for natural phrasing
         formatted_lyrics = self._format_lyrics_for_singing(lyrics)
         
-        data = {
-            "text": formatted_lyrics,
-            "model_id": model_id,
-            "voice_settings": {
+        data = self._build_payload(
+            formatted_lyrics, model_id, stability, similarity_boost, style, use_speaker_boost
+        )
+        
+        output_path = Path(output_path)
+        self._ensure_dir(output_path.parent)
+        
+        # Identical text/voice/settings always produce the same audio: reuse it
+        cache_path = None
+        if self.use_cache:
+            key = hashlib.sha256(json.dumps({
+                "text": formatted_lyrics,
+                "voice_id": voice_id,
+                "model_id": model_id,
                 "stability": stability,
                 "similarity_boost": similarity_boost,
-                "style": style,  # Important for singing - adds musical variation
+                "style": style,
                 "use_speaker_boost": use_speaker_boost
-            }
-        }
+            }, sort_keys=True).encode()).hexdigest()
+            cache_path = self.cache_dir / f"{key}.mp3"
+            if cache_path.exists():
+                shutil.copyfile(cache_path, output_path)
+                print(f"\n✓ Reused cached audio: {output_path}")
+                return str(output_path)
         
         print(f"\n🎤 Generating singing voice...")
         print(f"   Voice ID: {voice_id}")
@@ -124,46 +304,108 @@ class ElevenLabsSingingGenerator:
         print(f"   Stability: {stability} (lower = more variation)")
         print(f"   Style: {style} (higher = more expressive)")
         
-        response = requests.post(url, json=data, headers=self.headers)
-        
-        if response.status_code != 200:
-            print(f"Error: {response.status_code}")
-            print(response.text)
-            response.raise_for_status()
-        
-        # Save the audio file
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        # Stream the audio to disk as it arrives instead of buffering it in memory
+        with self._post_with_retries(url, data) as response:
+            if response.status_code != 200:
+                print(f"Error: {response.status_code}")
+                print(response.text)
+                response.raise_for_status()
+            
+            # Save the audio file (into the cache first, so it is only ever complete there)
+            if cache_path is not None:
+                self._ensure_dir(self.cache_dir)
+                # Per-thread temp name: generate_many may render identical lines at once
+                tmp_path = cache_path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+                total_bytes = self._write_stream(response, tmp_path)
+                os.replace(tmp_path, cache_path)
+                shutil.copyfile(cache_path, output_path)
+            else:
+                total_bytes = self._write_stream(response, output_path)
         
         print(f"\n✓ Singing audio generated successfully!")
         print(f"✓ Saved to: {output_path}")
-        print(f"✓ File size: {len(response.content) / 1024 / 1024:.2f} MB")
+        print(f"✓ File size: {total_bytes / 1024 / 1024:.2f} MB")
         
         return str(output_path)
     
+    def _post_with_retries(self, url: str, data: dict):
+        """
+        POST with a per-attempt read timeout that doubles after each timeout
+        (status retries and Retry-After are handled by the session adapter)
+        """
+        for attempt in range(POST_ATTEMPTS):
+            try:
+                return self.session.post(
+                    url,
+                    data=_dumps_body(data),  # Content-Type is set on the session
+                    stream=True,
+                    timeout=(CONNECT_TIMEOUT_S, INITIAL_READ_TIMEOUT_S * 2 ** attempt)
+                )
+            except requests.Timeout:
+                if attempt == POST_ATTEMPTS - 1:
+                    raise
+                print(f"⚠️  Request timed out, retrying ({attempt + 2}/{POST_ATTEMPTS})...")
+                time.sleep(2 ** attempt)
+    
+    def _build_payload(
+        self,
+        text: str,
+        model_id: str,
+        stability: float,
+        similarity_boost: float,
+        style: float,
+        use_speaker_boost: bool
+    ) -> dict:
+        """Build the text-to-speech request body"""
+        return {
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": {
+                "stability": stability,
+                "similarity_boost": similarity_boost,
+                "style": style,  # Important for singing - adds musical variation
+                "use_speaker_boost": use_speaker_boost
+            }
+        }
+    
+    def _write_stream(self, response, output_path: Path) -> int:
+        """Write a streamed response body to output_path; returns bytes written"""
+        total_bytes = 0
+        with open(output_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    total_bytes += len(chunk)
+        return total_bytes
+    
     def _format_lyrics_for_singing(self, lyrics: str) -> str:
         """
         Format lyrics for better singing generation
         Add punctuation cues for musical phrasing
         """
-        lines = lyrics.strip().split('\n')
         formatted = []
         
-        for line in lines:
+        # Split on "\n" only (strip() drops the "\r" of CRLF); splitlines() would
+        # also break on \f, \v, \x85, \u2028 and friends inside a line
+        for line in lyrics.split("\n"):
             line = line.strip()
             if line:
-                # Add periods to complete phrases (natural breathing points)
-                if not line.endswith(('.', '!', '?', ',')):
-                    # Check if it's likely the end of a verse or chorus
-                    if len(line) > 10:  # Reasonable line length
-                        line += '.'
+                # Add periods to complete phrases (natural breathing points) on
+                # lines long enough to be the end of a verse or chorus
+                if len(line) > 10 and not line.endswith(_PUNCT_END):
+                    line += '.'
                 formatted.append(line)
         
         return ' '.join(formatted)
     
+    def _read_lyrics(self, lyrics_path: Path) -> str:
+        """Read a lyrics file (through mmap when it is larger than MMAP_THRESHOLD)"""
+        if lyrics_path.stat().st_size > MMAP_THRESHOLD:
+            with lyrics_path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Same newline translation as text-mode reads
+                return mm.read().decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        return lyrics_path.read_text(encoding="utf-8")
+    
     def generate_from_file(
         self,
         lyrics_file: str,
@@ -187,13 +429,127 @@ class ElevenLabsSingingGenerator:
         if not lyrics_path.exists():
             raise FileNotFoundError(f"Lyrics file not found: {lyrics_file}")
         
-        with open(lyrics_path, "r", encoding="utf-8") as f:
-            lyrics = f.read()
+        lyrics = self._read_lyrics(lyrics_path)
         
         if output_path is None:
             output_path = lyrics_path.stem + "_singing.mp3"
         
         return self.generate_singing(lyrics, voice_id, output_path, **kwargs)
+    
+    def generate_many(
+        self,
+        lines: list,
+        voice_id: str,
+        output_dir: str = ".",
+        max_workers: int = 8,
+        **kwargs
+    ) -> list:
+        """
+        Generate one audio file per line concurrently
+        
+        Args:
+            lines: Lyrics texts, one output file each
+            voice_id: ID of the singing voice to use
+            output_dir: Directory for the generated line_NNN.mp3 files
+            max_workers: Maximum number of requests in flight at once
+            **kwargs: Additional arguments for generate_singing
+        
+        Returns:
+            Output paths, in the same order as lines
+        """
+        if self._pool is None or self._pool.max_workers != max_workers:
+            if self._pool is not None:
+                # Jobs already queued on the old pool still run to completion
+                self._pool.shutdown(wait=False)
+            self._pool = _RequestPool(self, max_workers=max_workers)
+        
+        futures = [
+            self._pool.submit(line, dict(
+                kwargs,
+                voice_id=voice_id,
+                output_path=str(Path(output_dir) / f"line_{i:03d}.mp3")
+            ))
+            for i, line in enumerate(lines)
+        ]
+        return [future.result() for future in futures]
+    
+    async def _post_segment(self, session, sem, data: dict, voice_id: str) -> bytes:
+        """POST one segment and return its MP3 bytes, backing off on 429/5xx"""
+        url = f"{self.base_url}/text-to-speech/{voice_id}"
+        async with sem:
+            for attempt in range(SEGMENT_RETRIES):
+                async with session.post(url, data=_dumps_body(data)) as response:
+                    if response.status not in RETRY_STATUS_CODES or attempt == SEGMENT_RETRIES - 1:
+                        response.raise_for_status()
+                        return await response.read()
+                await asyncio.sleep(2 ** attempt)
+    
+    async def generate_from_file_async(
+        self,
+        lyrics_file: str,
+        voice_id: str,
+        output_path: Optional[str] = None,
+        concurrency: int = 8,
+        model_id: str = "eleven_multilingual_v2",
+        stability: float = 0.5,
+        similarity_boost: float = 0.75,
+        style: float = 0.6,
+        use_speaker_boost: bool = True
+    ) -> str:
+        """
+        Generate singing from a lyrics file, synthesizing each stanza as a
+        concurrent request and joining the MP3 segments in order
+        (requires aiohttp)
+        
+        Args:
+            lyrics_file: Path to text file containing lyrics
+            voice_id: ID of the singing voice to use
+            output_path: Output path (if None, will use lyrics filename)
+            concurrency: Maximum number of requests in flight at once
+        
+        Returns:
+            Path to the generated audio file
+        """
+        import aiohttp
+        
+        lyrics_path = Path(lyrics_file)
+        if not lyrics_path.exists():
+            raise FileNotFoundError(f"Lyrics file not found: {lyrics_file}")
+        
+        lyrics = self._read_lyrics(lyrics_path)
+        
+        if output_path is None:
+            output_path = lyrics_path.stem + "_singing.mp3"
+        output_path = Path(output_path)
+        self._ensure_dir(output_path.parent)
+        
+        stanzas = [s for s in STANZA_SPLIT_RE.split(lyrics.strip()) if s.strip()]
+        payloads = [
+            self._build_payload(
+                self._format_lyrics_for_singing(stanza),
+                model_id, stability, similarity_boost, style, use_speaker_boost
+            )
+            for stanza in stanzas
+        ]
+        print(f"\n🎤 Generating {len(payloads)} segments ({concurrency} at a time)...")
+        
+        sem = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=50, limit_per_host=concurrency)
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector) as session:
+            segments = await asyncio.gather(
+                *(self._post_segment(session, sem, data, voice_id) for data in payloads)
+            )
+        
+        # MPEG frames are self-synchronizing, so segments can be byte-appended
+        # once the ID3 tags of all but the first are dropped
+        with open(output_path, "wb") as f:
+            for i, segment in enumerate(segments):
+                f.write(segment if i == 0 else strip_id3(segment))
+        
+        print(f"\n✓ Singing audio generated successfully!")
+        print(f"✓ Saved to: {output_path}")
+        
+        return str(output_path)
 
 
 def main():
@@ -258,11 +614,26 @@ def main():
         default=0.6,
         help="Style exaggeration 0.0-1.0 (higher = more musical expression)"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        metavar="N",
+        help="With --lyrics-file, synthesize stanzas as N concurrent requests (needs aiohttp)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of reusing cached audio"
+    )
     
     args = parser.parse_args()
     
+    generator = None
     try:
-        generator = ElevenLabsSingingGenerator(api_key=args.api_key)
+        generator = ElevenLabsSingingGenerator(
+            api_key=args.api_key, use_cache=not args.no_cache
+        )
         
         if args.list_voices:
             print("\n🎤 Searching for singing voices...\n")
@@ -285,7 +656,18 @@ def main():
         if not args.lyrics and not args.lyrics_file:
             parser.error("Either --lyrics or --lyrics-file must be provided")
         
-        if args.lyrics_file:
+        if args.lyrics_file and args.concurrency > 1:
+            output = asyncio.run(generator.generate_from_file_async(
+                args.lyrics_file,
+                args.voice_id,
+                args.output,
+                concurrency=args.concurrency,
+                model_id=args.model,
+                stability=args.stability,
+                similarity_boost=args.similarity,
+                style=args.style
+            ))
+        elif args.lyrics_file:
             output = generator.generate_from_file(
                 args.lyrics_file,
                 args.voice_id,
@@ -313,6 +695,9 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if generator is not None:
+            generator.close()
     
     return 0
 
@@ -0,0 +1,49 @@
+"""
+Concurrent cache stores in generate_singing.ElevenLabsSingingGenerator
+
+Run from music_generator/: python -m unittest discover tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HERE))
+
+from generate_singing import ElevenLabsSingingGenerator  # noqa: E402
+
+
+class CacheIndexTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp = Path(tmp_dir.name)
+
+        self.generator = ElevenLabsSingingGenerator(api_key="test")
+        self.addCleanup(self.generator.close)
+        self.generator.cache_dir = self.tmp / "tts"
+
+    def test_concurrent_stores_keep_every_index_entry(self):
+        audio = self.tmp / "audio.mp3"
+        audio.write_bytes(b"\xff\xfb" * 50000)
+
+        # Same pool generate_singing_async_io hands its downloads to
+        futures = [
+            self.generator._io_pool.submit(
+                self.generator._store_in_cache, f"key{i}", {"i": i}, audio
+            )
+            for i in range(40)
+        ]
+        for future in futures:
+            future.result()
+
+        index = json.loads((self.generator.cache_dir / "index.json").read_text())
+        self.assertEqual(sorted(index), sorted(f"key{i}" for i in range(40)))
+        self.assertEqual(list(self.generator.cache_dir.glob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Lyrics formatting in test.py's ElevenLabsSingingGenerator
+
+Run from music_generator/: python -m unittest discover tests
+"""
+
+import importlib.util
+import sys
+import unittest
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HERE))
+
+# test.py would shadow the stdlib "test" package, so load it under another name
+_spec = importlib.util.spec_from_file_location("singing_cli", HERE / "test.py")
+singing_cli = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(singing_cli)
+
+
+class FormatLyricsTest(unittest.TestCase):
+    def setUp(self):
+        self.generator = singing_cli.ElevenLabsSingingGenerator(api_key="test", use_cache=False)
+        self.addCleanup(self.generator.close)
+        self.format = self.generator._format_lyrics_for_singing
+
+    def test_adds_periods_to_long_unpunctuated_lines(self):
+        lyrics = "  Under the summer sky  \n\nShort one\nWe were dancing all night!\n"
+        self.assertEqual(
+            self.format(lyrics),
+            "Under the summer sky. Short one We were dancing all night!"
+        )
+
+    def test_crlf_matches_lf(self):
+        lyrics = "Under the summer sky\nShort one\nWe were dancing all night"
+        self.assertEqual(self.format(lyrics.replace("\n", "\r\n")), self.format(lyrics))
+
+    def test_only_newline_splits_lines(self):
+        # Form feeds, vertical tabs and Unicode separators stay inside the line
+        for sep in ("\f", "\v", "\x1c", "\x85", "\u2028"):
+            with self.subTest(sep=repr(sep)):
+                self.assertEqual(
+                    self.format(f"Under the summer{sep}sky was blue"),
+                    f"Under the summer{sep}sky was blue."
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
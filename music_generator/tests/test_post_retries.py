@@ -0,0 +1,95 @@
+"""
+Timeout retries in test.py's ElevenLabsSingingGenerator, against a slow local server
+
+Run from music_generator/: python -m unittest discover tests
+"""
+
+import importlib.util
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+HERE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HERE))
+
+# test.py would shadow the stdlib "test" package, so load it under another name
+_spec = importlib.util.spec_from_file_location("singing_cli", HERE / "test.py")
+singing_cli = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(singing_cli)
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Answers each POST after the next delay in server.delays"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            delay = self.server.delays[min(self.server.posts, len(self.server.delays) - 1)]
+            self.server.posts += 1
+        threading.Event().wait(delay)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", "3")
+            self.end_headers()
+            self.wfile.write(b"mp3")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client already gave up on this attempt
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PostWithRetriesTest(unittest.TestCase):
+    def start_server(self, delays):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+        server.daemon_threads = True
+        server.delays = delays
+        server.posts = 0
+        server.lock = threading.Lock()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def setUp(self):
+        patches = [
+            mock.patch.object(singing_cli, "INITIAL_READ_TIMEOUT_S", 0.2),
+            mock.patch.object(singing_cli.time, "sleep"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.generator = singing_cli.ElevenLabsSingingGenerator(api_key="test", use_cache=False)
+        self.addCleanup(self.generator.close)
+        # The production adapter (and its Retry policy) is mounted for https only
+        self.generator.session.mount("http://", self.generator.session.get_adapter("https://"))
+
+    def url(self, server):
+        return f"http://127.0.0.1:{server.server_port}/v1/text-to-speech/voice"
+
+    def test_read_timeout_is_retried_with_a_longer_timeout(self):
+        # 0.3 s misses the first 0.2 s read timeout but fits the doubled 0.4 s one
+        server = self.start_server([0.3])
+
+        with self.generator._post_with_retries(self.url(server), {"text": "la"}) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b"mp3")
+        self.assertEqual(server.posts, 2)
+
+    def test_gives_up_after_post_attempts(self):
+        server = self.start_server([2.0])
+
+        with self.assertRaises(requests.Timeout):
+            self.generator._post_with_retries(self.url(server), {"text": "la"})
+        self.assertEqual(server.posts, singing_cli.POST_ATTEMPTS)
+
+
+if __name__ == "__main__":
+    unittest.main()